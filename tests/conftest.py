@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,15 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def inline_thumbnails(settings):
+    # Фоновые потоки не должны писать в базу, которую очищает тест.
+    settings.POST_THUMBNAIL_WORKERS = 0
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    # Кэш в памяти процесса, а не общий кэш разработчика.
+    settings.CACHES = settings.LOCAL_CACHES
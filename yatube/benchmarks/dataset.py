@@ -0,0 +1,146 @@
+"""Синтетический набор данных для нагрузочных тестов.
+
+Пользователи и группы вставляются через bulk_create, посты — через
+posts.importing.import_posts порциями вместе со счётчиками. Картинки
+(если заданы) — несколько разных файлов, которые раздаются постам по
+кругу, миниатюры для них создаются заранее.
+
+Запуск из каталога yatube, база берётся из настроек:
+
+    python -m benchmarks.dataset --users 1000 --groups 50 --posts 100000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+BENCH_USER = 'benchmark'
+BENCH_PASSWORD = 'benchmark'
+WORDS = ('пост', 'лента', 'группа', 'автор', 'картинка', 'новость',
+         'город', 'утро', 'кофе', 'книга', 'поезд', 'море', 'лес')
+IMAGE_SIZE = (1200, 800)
+# Интервал между датами соседних постов.
+POST_INTERVAL = timedelta(minutes=7)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def create_users(count, batch_size):
+    """Создаёт BENCH_USER (staff) и count авторов с общим паролем."""
+    from django.contrib.auth.hashers import make_password
+    from posts.models import User
+
+    password = make_password(BENCH_PASSWORD)
+    users = [User(username=BENCH_USER, password=password, is_staff=True)]
+    users += [User(username=f'user_{i}', password=password)
+              for i in range(count)]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    return [user.username for user in users]
+
+
+def create_groups(count, rng, batch_size):
+    from posts.models import Group
+
+    Group.objects.bulk_create(
+        [Group(title=f'Группа {i}', slug=f'group_{i}',
+               description=_text(rng, 12))
+         for i in range(count)],
+        batch_size=batch_size
+    )
+    return [f'group_{i}' for i in range(count)]
+
+
+def create_images(count, rng):
+    """Сохраняет count JPEG разных цветов и создаёт их миниатюры."""
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from PIL import Image
+    from posts.thumbnails import generate_thumbnails
+
+    names = []
+    for i in range(count):
+        buffer = BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', IMAGE_SIZE, color).save(buffer, 'JPEG')
+        names.append(default_storage.save(f'posts/benchmark_{i}.jpg',
+                                          ContentFile(buffer.getvalue())))
+    for name in names:
+        generate_thumbnails(name)
+    return names
+
+
+def post_records(count, usernames, slugs, images, rng):
+    """Записи для import_posts: от новых к старым, часть без группы."""
+    started = time.time()
+    for i in range(count):
+        yield {
+            'text': _text(rng, rng.randint(5, 60)),
+            'author': rng.choice(usernames),
+            'group': rng.choice(slugs) if slugs and rng.random() < 0.7
+            else None,
+            'pub_date': _isoformat(started, i),
+            'image': images[i % len(images)] if images else '',
+        }
+
+
+def _isoformat(started, i):
+    pub_date = (datetime.fromtimestamp(started, timezone.utc)
+                - POST_INTERVAL * i)
+    return pub_date.isoformat()
+
+
+def generate(users, groups, posts, images=0, seed=0, batch_size=500,
+             on_chunk=None):
+    """Заполняет пустую базу и возвращает, сколько чего создано."""
+    from posts.importing import import_posts
+
+    rng = random.Random(seed)
+    usernames = create_users(users, batch_size)
+    slugs = create_groups(groups, rng, batch_size)
+    image_names = create_images(images, rng)
+    created, _ = import_posts(
+        post_records(posts, usernames, slugs, image_names, rng),
+        batch_size=batch_size, on_chunk=on_chunk
+    )
+    return {'users': len(usernames), 'groups': len(slugs),
+            'posts': created, 'images': len(image_names)}
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--images', type=int, default=0,
+                        help='Сколько разных картинок раздать постам.')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument('--migrate', action='store_true',
+                        help='Сначала применить миграции.')
+    args = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+    if args.migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+    def progress(created, skipped):
+        print(f'Создано постов: {created}', end='\r', flush=True)
+
+    started = time.perf_counter()
+    counts = generate(args.users, args.groups, args.posts, args.images,
+                      args.seed, on_chunk=progress)
+    print(', '.join(f'{name}: {count}' for name, count in counts.items()),
+          f'за {time.perf_counter() - started:.1f} с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""Нагрузочный тест всех URL из yatube/urls.py через WSGI-приложение.
+
+База заполняется benchmarks.dataset во временном каталоге, затем
+--workers процессов с application из yatube/wsgi.py (как воркеры
+WSGI-сервера) обходят все URL --rounds раз в случайном порядке.
+Число SQL-запросов берётся из заголовка Server-Timing. Результат —
+JSON с p50/p95/p99, пропускной способностью и запросами на ответ по
+каждому URL. С --baseline результат сравнивается с сохранённым
+прогоном, и при регрессии код возврата 1.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.load --posts 50000 --workers 4 -o run.json
+    python -m benchmarks.load --posts 50000 --workers 4 --baseline run.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from . import dataset
+
+TIMING = re.compile(r'(?P<name>\w+);dur=(?P<dur>[\d.]+)'
+                    r'(;desc="(?P<queries>\d+) queries")?')
+# Выход из аккаунта ломает сессию остальным URL, админка — не наш код.
+EXCLUDE = ('admin', 'logout', 'users:logout')
+PERCENTILES = (50, 95, 99)
+# Строки запроса, без которых страница почти пустая.
+QUERY_STRINGS = {'posts:search': {'q': 'пост'}}
+
+
+def setup_django(db_name, media_root):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_name
+    settings.MEDIA_ROOT = media_root
+    # Свой кэш в памяти: записи рабочего кэша не попадают в замеры.
+    settings.CACHES = settings.LOCAL_CACHES
+    settings.DEBUG = False
+    settings.POST_THUMBNAIL_WORKERS = 0
+    settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+    from yatube.wsgi import application
+    return application
+
+
+def _walk(patterns, namespace='', params=()):
+    for pattern in patterns:
+        names = params + tuple(pattern.pattern.regex.groupindex)
+        if hasattr(pattern, 'url_patterns'):
+            prefix = namespace
+            if pattern.namespace:
+                prefix = f'{namespace}{pattern.namespace}:'
+            yield from _walk(pattern.url_patterns, prefix, names)
+        elif pattern.name:
+            yield f'{namespace}{pattern.name}', names
+
+
+def url_values():
+    """Значения параметров URL: последний пост BENCH_USER и его группа."""
+    from django.contrib.auth.tokens import default_token_generator
+    from django.utils.encoding import force_bytes
+    from django.utils.http import urlsafe_base64_encode
+    from posts.models import Group, Post, User
+
+    user = User.objects.get(username=dataset.BENCH_USER)
+    post = (Post.objects.filter(author=user).first()
+            or Post.objects.first())
+    group = (Group.objects.filter(posts_count__gt=0)
+             .order_by('-posts_count').first())
+    values = {
+        'username': user.username,
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+    if post is not None:
+        values['post_id'] = post.pk
+    if group is not None:
+        values['slug'] = group.slug
+    return values
+
+
+def collect_urls(exclude=EXCLUDE):
+    """Пары (имя, путь) для всех URL проекта; URL с параметрами, для
+    которых нет значений, пропускаются. Одинаковые пути — один раз.
+    """
+    from django.urls import get_resolver, reverse
+    from django.utils.http import urlencode
+
+    values = url_values()
+    urls = {}
+    for name, params in _walk(get_resolver().url_patterns):
+        if name in exclude or name.split(':')[0] in exclude:
+            continue
+        if any(param not in values for param in params):
+            continue
+        path = reverse(name, kwargs={param: values[param]
+                                     for param in params})
+        if name in QUERY_STRINGS:
+            path = f'{path}?{urlencode(QUERY_STRINGS[name])}'
+        urls.setdefault(path, name)
+    return [(name, path) for path, name in urls.items()]
+
+
+def login(username):
+    """Создаёт сессию пользователя и возвращает значение Cookie."""
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+    from django.contrib.auth import SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+    from posts.models import User
+
+    user = User.objects.get(username=username)
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def prepare(db_name, media_root, args):
+    """Заполняет базу и возвращает набор данных, URL и cookie."""
+    setup_django(db_name, media_root)
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    counts = dataset.generate(args.users, args.groups, args.posts,
+                              args.images, args.seed)
+    cookie = None if args.anonymous else login(dataset.BENCH_USER)
+    return counts, collect_urls(), cookie
+
+
+def server_timing(headers):
+    """Метрики из Server-Timing: миллисекунды по имени и queries."""
+    timings = {}
+    for match in TIMING.finditer(headers.get('Server-Timing', '')):
+        timings[match['name']] = float(match['dur'])
+        if match['queries'] is not None:
+            timings['queries'] = int(match['queries'])
+    return timings
+
+
+def request(application, environ):
+    """Выполняет запрос и возвращает статус и заголовки ответа."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(headers)
+
+    body = application(environ, start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return response['status'], response['headers']
+
+
+def run_worker(db_name, media_root, urls, cookie, rounds, start_at, seed):
+    application = setup_django(db_name, media_root)
+    from django.test import RequestFactory
+
+    factory = RequestFactory(**({'HTTP_COOKIE': cookie} if cookie else {}))
+    # Первый обход прогревает кэши процесса и не входит в замер.
+    for _, path in urls:
+        request(application, factory.get(path).environ)
+    rng = random.Random(seed)
+    samples = defaultdict(list)
+    time.sleep(max(0, start_at - time.time()))
+    for _ in range(rounds):
+        for name, path in rng.sample(urls, len(urls)):
+            environ = factory.get(path).environ
+            started = time.perf_counter()
+            status, headers = request(application, environ)
+            samples[name].append((time.perf_counter() - started,
+                                  server_timing(headers).get('queries'),
+                                  status))
+    return samples, time.time()
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def summarize(samples):
+    latencies = [sample[0] * 1000 for sample in samples]
+    queries = [sample[1] for sample in samples if sample[1] is not None]
+    summary = {
+        'requests': len(samples),
+        'errors': sum(sample[2] >= 400 for sample in samples),
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(percentile(latencies, percent), 3)
+    summary['queries_per_request'] = (
+        round(sum(queries) / len(queries), 2) if queries else None
+    )
+    return summary
+
+
+def run(args):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'db.sqlite3')
+        media_root = os.path.join(tmp, 'media')
+        with context.Pool(1) as pool:
+            counts, urls, cookie = pool.apply(
+                prepare, (db_name, media_root, args)
+            )
+        start_at = time.time() + args.warmup
+        with context.Pool(args.workers) as pool:
+            results = pool.starmap(run_worker, [
+                (db_name, media_root, urls, cookie, args.rounds, start_at,
+                 args.seed + worker)
+                for worker in range(args.workers)
+            ])
+    duration = max(finished for _, finished in results) - start_at
+    by_url = defaultdict(list)
+    for samples, _ in results:
+        for name, values in samples.items():
+            by_url[name].extend(values)
+    paths = dict(urls)
+    total = summarize([value for values in by_url.values()
+                       for value in values])
+    total['duration_s'] = round(duration, 3)
+    total['throughput_rps'] = round(total['requests'] / duration, 1)
+    return {
+        'config': {
+            'workers': args.workers, 'rounds': args.rounds,
+            'anonymous': args.anonymous,
+        },
+        'dataset': counts,
+        'total': total,
+        'urls': {name: {'path': paths[name], **summarize(values)}
+                 for name, values in sorted(by_url.items())},
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Строки сравнения с baseline и список регрессий.
+
+    Регрессия — p95 хуже больше чем на tolerance или больше SQL-запросов.
+    """
+    lines = [f'{"url":<32}{"p95 ms":>10}{"было":>10}{"queries":>9}'
+             f'{"было":>7}']
+    regressions = []
+    for name, result in report['urls'].items():
+        base = baseline['urls'].get(name)
+        if base is None:
+            continue
+        slower = result['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+        more_queries = ((result['queries_per_request'] or 0)
+                        > (base['queries_per_request'] or 0))
+        if slower or more_queries:
+            regressions.append(name)
+        mark = ' !' if slower or more_queries else ''
+        lines.append(
+            f'{name:<32}{result["p95_ms"]:>10.1f}{base["p95_ms"]:>10.1f}'
+            f'{result["queries_per_request"] or 0:>9}'
+            f'{base["queries_per_request"] or 0:>7}{mark}'
+        )
+    throughput = report['total']['throughput_rps']
+    base_throughput = baseline['total']['throughput_rps']
+    lines.append(f'Пропускная способность: {throughput} запросов/с, '
+                 f'было {base_throughput}')
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=20,
+                        help='Сколько раз каждый воркер обходит все URL.')
+    parser.add_argument('--warmup', type=float, default=3.0,
+                        help='Секунд на запуск воркеров до начала замера.')
+    parser.add_argument('--anonymous', action='store_true',
+                        help='Без входа BENCH_USER (staff, автор постов).')
+    parser.add_argument('-o', '--output',
+                        help='Куда записать JSON, по умолчанию stdout.')
+    parser.add_argument('--baseline', help='JSON прошлого прогона.')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Допустимое ухудшение p95, доля.')
+    args = parser.parse_args()
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        lines, regressions = compare(report, baseline, args.tolerance)
+        print('\n'.join(lines), file=sys.stderr)
+        if regressions:
+            print(f'Регрессии: {", ".join(regressions)}', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
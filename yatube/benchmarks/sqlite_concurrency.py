@@ -0,0 +1,174 @@
+"""Конкурентное чтение и запись в SQLite из нескольких WSGI-воркеров.
+
+Каждый воркер — отдельный процесс с WSGIHandler, как у gunicorn с
+несколькими workers. Воркеры читают главную страницу авторизованным
+пользователем (мимо кэша страниц) и с вероятностью --write-ratio
+создают пост. Сравниваются профили:
+
+- default: журнал по умолчанию, без PRAGMA, CONN_MAX_AGE = 0;
+- tuned: SQLITE_PRAGMAS из настроек (WAL и др.) и CONN_MAX_AGE из
+  настроек.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.sqlite_concurrency --workers 4 --duration 10
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+BENCH_USER = 'benchmark'
+CSRF_TOKEN = 'b' * 64
+PROFILES = ('default', 'tuned')
+
+
+def setup_django(db_name, profile):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+    database = settings.DATABASES['default']
+    database['NAME'] = db_name
+    # Свой кэш в памяти: записи рабочего кэша не попадают в замеры.
+    settings.CACHES = settings.LOCAL_CACHES
+    if profile == 'default':
+        settings.SQLITE_PRAGMAS = {}
+        database['CONN_MAX_AGE'] = 0
+    settings.DEBUG = False
+    settings.POST_THUMBNAIL_WORKERS = 0
+    import django
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+
+def prepare(db_name, profile, posts):
+    """Создаёт базу профиля: схему, пользователя и posts постов."""
+    setup_django(db_name, profile)
+    from django.core.management import call_command
+    from posts.models import Group, Post, User
+
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_user(username=BENCH_USER)
+    group = Group.objects.create(title='Бенчмарк', slug='benchmark',
+                                 description='Посты для нагрузки')
+    Post.objects.bulk_create(
+        [Post(author=user, group=group, text=f'Пост {i} ' * 20)
+         for i in range(posts)],
+        batch_size=500
+    )
+
+
+def run_worker(db_name, profile, start_at, duration, write_ratio, seed):
+    setup_django(db_name, profile)
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+    from django.urls import reverse
+    from posts.models import User
+
+    user = User.objects.get(username=BENCH_USER)
+    session = SessionStore()
+    session['_auth_user_id'] = str(user.pk)
+    session['_auth_user_backend'] = (
+        'django.contrib.auth.backends.ModelBackend'
+    )
+    session['_auth_user_hash'] = user.get_session_auth_hash()
+    session.create()
+    cookies = f'sessionid={session.session_key}; csrftoken={CSRF_TOKEN}'
+    factory = RequestFactory(HTTP_COOKIE=cookies)
+    handler = WSGIHandler()
+    index = reverse('posts:index')
+    create = reverse('posts:create_post')
+    rng = random.Random(seed)
+    latencies = {'read': [], 'write': []}
+    errors = 0
+
+    def start_response(status, headers):
+        pass
+
+    time.sleep(max(0, start_at - time.time()))
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        kind = 'write' if rng.random() < write_ratio else 'read'
+        if kind == 'write':
+            request = factory.post(create, {
+                'text': 'Пост из бенчмарка',
+                'csrfmiddlewaretoken': CSRF_TOKEN,
+            })
+            expected = 302
+        else:
+            request = factory.get(index)
+            expected = 200
+        started = time.perf_counter()
+        response = handler(request.environ, start_response)
+        b''.join(response)
+        response.close()
+        latencies[kind].append(time.perf_counter() - started)
+        if response.status_code != expected:
+            errors += 1
+    return latencies, errors
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run_profile(profile, args):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'db.sqlite3')
+        process = context.Process(target=prepare,
+                                  args=(db_name, profile, args.posts))
+        process.start()
+        process.join()
+        start_at = time.time() + args.warmup
+        with context.Pool(args.workers) as pool:
+            results = pool.starmap(run_worker, [
+                (db_name, profile, start_at, args.duration,
+                 args.write_ratio, seed)
+                for seed in range(args.workers)
+            ])
+    reads = [value for result in results for value in result[0]['read']]
+    writes = [value for result in results for value in result[0]['write']]
+    return {
+        'profile': profile,
+        'reads_per_second': len(reads) / args.duration,
+        'writes_per_second': len(writes) / args.duration,
+        'read_p50_ms': statistics.median(reads) * 1000 if reads else 0.0,
+        'read_p95_ms': _percentile(reads, 95) * 1000,
+        'write_p95_ms': _percentile(writes, 95) * 1000,
+        'errors': sum(result[1] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--warmup', type=float, default=3.0,
+                        help='Секунд на запуск воркеров до начала замера.')
+    parser.add_argument('--profile', choices=PROFILES, action='append',
+                        help='По умолчанию оба профиля.')
+    args = parser.parse_args()
+    columns = ('profile', 'reads_per_second', 'writes_per_second',
+               'read_p50_ms', 'read_p95_ms', 'write_p95_ms', 'errors')
+    print(' '.join(f'{column:>17}' for column in columns))
+    for profile in args.profile or PROFILES:
+        result = run_profile(profile, args)
+        print(' '.join(
+            f'{result[column]:>17.1f}' if isinstance(result[column], float)
+            else f'{result[column]:>17}'
+            for column in columns
+        ))
+
+
+if __name__ == '__main__':
+    main()
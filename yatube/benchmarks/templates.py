@@ -0,0 +1,102 @@
+"""Время рендеринга лент с обычным и кэширующим загрузчиком шаблонов.
+
+Профили:
+
+- interpreted: filesystem и app_directories без кэша, каждый запрос
+  заново читает и разбирает base.html, includes и paginator;
+- precompiled: YATUBE_TEMPLATES_PRECOMPILED=1, кэширующий загрузчик и
+  разбор всех шаблонов при старте.
+
+Каждый профиль — отдельный процесс с application из yatube/wsgi.py на
+одной и той же базе. Запросы идут от пользователя, чтобы не попадать в
+кэш страниц; время шаблонов берётся из tpl в Server-Timing.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.templates --posts 5000 --requests 200
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+
+from . import dataset, load
+
+PROFILES = ('interpreted', 'precompiled')
+PAGES = ('posts:index', 'posts:group_list', 'posts:profile')
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def run_profile(profile, db_name, media_root, urls, cookie, requests):
+    if profile == 'precompiled':
+        os.environ['YATUBE_TEMPLATES_PRECOMPILED'] = '1'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+    if profile == 'interpreted':
+        # При DEBUG = False Django сам включил бы кэширующий загрузчик.
+        settings.TEMPLATES[0]['APP_DIRS'] = False
+        settings.TEMPLATES[0]['OPTIONS']['loaders'] = UNCACHED_LOADERS
+    application = load.setup_django(db_name, media_root)
+    from django.test import RequestFactory
+
+    factory = RequestFactory(HTTP_COOKIE=cookie)
+    results = {}
+    for name, path in urls:
+        load.request(application, factory.get(path).environ)
+        tpl, total = [], []
+        for _ in range(requests):
+            _, headers = load.request(application, factory.get(path).environ)
+            timing = load.server_timing(headers)
+            tpl.append(timing['tpl'])
+            total.append(timing['total'])
+        results[name] = {
+            'tpl_ms': statistics.mean(tpl),
+            'tpl_p95_ms': load.percentile(tpl, 95),
+            'total_ms': statistics.mean(total),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Запросов к каждой странице в профиле.')
+    parser.set_defaults(anonymous=False)
+    args = parser.parse_args()
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, 'db.sqlite3')
+        media_root = os.path.join(tmp, 'media')
+        with context.Pool(1) as pool:
+            _, urls, cookie = pool.apply(
+                load.prepare, (db_name, media_root, args)
+            )
+        urls = [(name, path) for name, path in urls if name in PAGES]
+        results = {}
+        for profile in PROFILES:
+            with context.Pool(1) as pool:
+                results[profile] = pool.apply(run_profile, (
+                    profile, db_name, media_root, urls, cookie,
+                    args.requests
+                ))
+    columns = ('profile', 'page', 'tpl_ms', 'tpl_p95_ms', 'total_ms')
+    print(' '.join(f'{column:>17}' for column in columns))
+    for profile, pages in results.items():
+        for name, result in pages.items():
+            print(f'{profile:>17} {name:>17}', ' '.join(
+                f'{result[column]:>17.2f}' for column in columns[2:]
+            ))
+    for name, _ in urls:
+        before = results['interpreted'][name]['tpl_ms']
+        after = results['precompiled'][name]['tpl_ms']
+        print(f'{name}: шаблоны быстрее на {before - after:.2f} мс '
+              f'({(1 - after / before) * 100:.0f}%)')
+
+
+if __name__ == '__main__':
+    main()
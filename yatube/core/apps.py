@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        if settings.TEMPLATES_PRECOMPILED:
+            from .templates import preload_templates
+            preload_templates()
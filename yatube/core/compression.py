@@ -0,0 +1,210 @@
+import hashlib
+import re
+import time
+import zlib
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from .staticfiles import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript',
+                      'application/xml', 'application/rss+xml',
+                      'application/atom+xml', 'application/x-ndjson')
+COMPRESSED_CACHE_VERSION = 1
+SHARED_ATTRIBUTE = '_compress_shared'
+STRONG_ETAG = re.compile(r'^"')
+NO_TRANSFORM = re.compile(r'(^|,)\s*no-transform\s*(,|$)', re.IGNORECASE)
+
+
+class CompressionStats:
+    """Байты до и после сжатия и процессорное время в пределах процесса."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.skipped = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu = 0.0
+        self.cache_hits = 0
+
+    def record(self, bytes_in, bytes_out, cpu, cache_hit=False):
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu += cpu
+            self.cache_hits += cache_hit
+
+    def skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def as_dict(self):
+        return {
+            'skipped': self.skipped,
+            'compressed': self.compressed,
+            'cache_hits': self.cache_hits,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+            'cpu_ms': self.cpu * 1000,
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def share_compressed(response):
+    """Помечает ответ, одинаковый для многих посетителей.
+
+    Сжатые байты такого ответа кэшируются по хэшу содержимого, и
+    повторная отдача из кэша страниц не сжимает его заново.
+    """
+    setattr(response, SHARED_ATTRIBUTE, True)
+    return response
+
+
+def _gzip_compressor():
+    return zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED,
+                            16 + zlib.MAX_WBITS)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_BR_QUALITY)
+    compressor = _gzip_compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток по кускам. Буфер сбрасывается, как только с прошлого
+    сброса набралось COMPRESSION_STREAM_FLUSH_SIZE байт: клиент получает
+    данные постепенно, а мелкие куски (строки экспорта) не портят сжатие.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BR_QUALITY
+        )
+        process, flush = compressor.process, compressor.flush
+        finish = compressor.finish
+    else:
+        compressor = _gzip_compressor()
+        process = compressor.compress
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        finish = compressor.flush
+    bytes_in = bytes_out = unflushed = 0
+    cpu = 0.0
+    try:
+        for chunk in chunks:
+            started = time.thread_time()
+            data = process(chunk)
+            unflushed += len(chunk)
+            if unflushed >= settings.COMPRESSION_STREAM_FLUSH_SIZE:
+                data += flush()
+                unflushed = 0
+            cpu += time.thread_time() - started
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        started = time.thread_time()
+        data = finish()
+        cpu += time.thread_time() - started
+        bytes_out += len(data)
+        yield data
+    finally:
+        if bytes_in:
+            compression_stats.record(bytes_in, bytes_out, cpu)
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING',
+                                                   ''))
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compressed_key(content, encoding):
+    digest = hashlib.md5(content).hexdigest()
+    return f'compressed:{COMPRESSED_CACHE_VERSION}:{encoding}:{digest}'
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы в br или gzip по Accept-Encoding.
+
+    Ответы короче COMPRESSION_MIN_SIZE, уже сжатые (статика) и с
+    Cache-Control: no-transform не трогает. Потоковые ответы сжимаются
+    по кускам. Для ответов, помеченных share_compressed, сжатые байты
+    берутся из кэша. Счётчики — в compression_stats.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '')
+        if (response.status_code != 200
+                or response.has_header('Content-Encoding')
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or NO_TRANSFORM.search(response.get('Cache-Control', ''))):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None or (not response.streaming and len(
+                response.content) < settings.COMPRESSION_MIN_SIZE):
+            compression_stats.skip()
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = self.compress_content(response, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        if response.has_header('ETag'):
+            # Сжатое тело отличается от исходного, но равнозначно ему.
+            response['ETag'] = STRONG_ETAG.sub('W/"', response['ETag'])
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compress_content(response, encoding):
+        content = response.content
+        key = None
+        if getattr(response, SHARED_ATTRIBUTE, False):
+            key = compressed_key(content, encoding)
+            compressed = cache.get(key)
+            if compressed is not None:
+                compression_stats.record(len(content), len(compressed), 0.0,
+                                         cache_hit=True)
+                return compressed
+        started = time.thread_time()
+        compressed = compress(content, encoding)
+        compression_stats.record(len(content), len(compressed),
+                                 time.thread_time() - started)
+        if key is not None:
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        return compressed
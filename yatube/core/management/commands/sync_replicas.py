@@ -0,0 +1,36 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики через backup API. '
+            'Запускать чаще, чем раз в REPLICA_LAG секунд.')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не заданы: укажите YATUBE_REPLICAS.')
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('sync_replicas копирует только SQLite.')
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                started = time.monotonic()
+                connections[alias].close()
+                target = sqlite3.connect(
+                    connections[alias].settings_dict['NAME']
+                )
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(
+                    f'{alias}: {time.monotonic() - started:.2f} с'
+                )
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены.'))
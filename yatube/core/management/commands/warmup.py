@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...warmup import STEPS, format_timings, warm_up
+
+
+class Command(BaseCommand):
+    help = ('Прогревает процесс, как при загрузке yatube.wsgi, и выводит '
+            'время каждого шага.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'steps', nargs='*', metavar='step',
+            help=f'Шаги прогрева: {", ".join(STEPS)}. '
+                 f'По умолчанию WARMUP_STEPS.'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['steps']) - set(STEPS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные шаги: {", ".join(sorted(unknown))}.'
+            )
+        timings = warm_up(options['steps'] or None)
+        for name, elapsed in timings:
+            self.stdout.write(f'{name:<14}{elapsed * 1000:>10.1f} мс')
+        self.stdout.write(self.style.SUCCESS(format_timings(timings)))
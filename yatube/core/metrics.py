@@ -0,0 +1,88 @@
+import bisect
+from threading import Lock
+
+# Верхние границы корзин гистограмм в миллисекундах (для queries — штуки).
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+METRICS = ('total', 'view', 'db', 'tpl', 'queries')
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, безопасная для потоков."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def percentile(self, percent):
+        """Верхняя граница корзины, в которую попал процентиль.
+
+        None, если процентиль за последней границей.
+        """
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        if index < len(self.buckets):
+            return self.buckets[index]
+        return None
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': dict(zip(
+                [str(bound) for bound in self.buckets] + ['+Inf'],
+                self.counts
+            )),
+        }
+
+
+class RequestMetrics:
+    """Гистограммы времени запросов по имени URL, например posts:index."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = {}
+
+    def record(self, view_name, values):
+        histograms = self._views.get(view_name)
+        if histograms is None:
+            with self._lock:
+                histograms = self._views.setdefault(
+                    view_name, {metric: Histogram() for metric in METRICS}
+                )
+        for metric, value in values.items():
+            histograms[metric].observe(value)
+
+    def as_dict(self):
+        with self._lock:
+            views = dict(self._views)
+        return {
+            view_name: {metric: histogram.as_dict()
+                        for metric, histogram in histograms.items()}
+            for view_name, histograms in sorted(views.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+from .metrics import request_metrics
+
+_local = threading.local()
+_render = Template.render
+_instrumented = 0
+_instrumented_lock = threading.Lock()
+
+
+class RequestTimings:
+    """Время одного запроса; заодно обёртка execute для подсчёта SQL."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.tpl = 0.0
+        self.view = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def as_values(self, total):
+        """Значения для гистограмм: время в миллисекундах."""
+        return {
+            'total': total * 1000,
+            'view': self.view * 1000,
+            'db': self.db * 1000,
+            'tpl': self.tpl * 1000,
+            'queries': self.queries,
+        }
+
+    def header(self, total):
+        return (f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries", '
+                f'tpl;dur={self.tpl * 1000:.2f}, '
+                f'view;dur={self.view * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}')
+
+
+def get_timings():
+    return getattr(_local, 'timings', None)
+
+
+def _timed_render(self, context):
+    timings = get_timings()
+    if timings is None or timings.template_depth:
+        return _render(self, context)
+    # Вложенные шаблоны (include, post_card) уже внутри этого замера.
+    timings.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _render(self, context)
+    finally:
+        timings.tpl += time.perf_counter() - started
+        timings.template_depth -= 1
+
+
+@contextmanager
+def instrumented_templates():
+    """Подменяет Template.render, пока идёт хотя бы один замер.
+
+    Подмена общая для процесса, как instrumented_test_render в тестах
+    Django, но без замера (в другом потоке) render идёт напрямую.
+    """
+    global _instrumented
+    with _instrumented_lock:
+        if not _instrumented:
+            Template.render = _timed_render
+        _instrumented += 1
+    try:
+        yield
+    finally:
+        with _instrumented_lock:
+            _instrumented -= 1
+            if not _instrumented:
+                Template.render = _render
+
+
+class ServerTimingMiddleware:
+    """Пишет в Server-Timing число и время SQL, время шаблонов, view и
+    всего запроса, и копит их в гистограммах request_metrics.
+
+    Замеряется только доля SERVER_TIMING_SAMPLE_RATE запросов, остальные
+    проходят без обёрток. У потоковых ответов заголовок описывает время
+    до начала тела, а в гистограммы попадает и чтение тела. Ставится
+    первым в MIDDLEWARE, а ViewTimingMiddleware — последним.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timings = RequestTimings()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            stack.enter_context(instrumented_templates())
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            stack.callback(setattr, _local, 'timings', None)
+            _local.timings = timings
+            response = self.get_response(request)
+            response['Server-Timing'] = timings.header(
+                time.perf_counter() - started
+            )
+            if response.streaming:
+                response.streaming_content = self.timed_stream(
+                    request, response.streaming_content, timings, started,
+                    stack.pop_all()
+                )
+                return response
+        self.record(request, timings, time.perf_counter() - started)
+        return response
+
+    def timed_stream(self, request, content, timings, started, stack):
+        try:
+            with stack:
+                _local.timings = timings
+                yield from content
+        finally:
+            self.record(request, timings, time.perf_counter() - started)
+
+    @staticmethod
+    def record(request, timings, total):
+        match = request.resolver_match
+        if match and match.namespace in settings.SERVER_TIMING_NAMESPACES:
+            request_metrics.record(match.view_name, timings.as_values(total))
+
+
+class ViewTimingMiddleware:
+    """Замеряет время внутри всех остальных middleware: view и рендер."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = get_timings()
+        if timings is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        timings.view = time.perf_counter() - started
+        return response
@@ -0,0 +1,90 @@
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Приложения, модели которых можно читать с реплик. Сессии, миниатюры
+# sorl и прочее всегда читаются с основной базы.
+REPLICA_APPS = {'posts', 'auth'}
+STICKY_COOKIE = 'primary_db'
+FENCE_KEY = 'replica_fence'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+
+
+def get_replica_alias():
+    """Реплика, с которой читает текущий поток, или None."""
+    return getattr(_state, 'alias', None)
+
+
+def fence_replicas():
+    """Отмечает запись: ближайшие REPLICA_LAG секунд реплики отстают."""
+    if settings.REPLICA_DATABASES:
+        cache.set(FENCE_KEY, True, settings.REPLICA_LAG)
+
+
+def replicas_may_lag():
+    return cache.get(FENCE_KEY) is not None
+
+
+def read_from_replica(view):
+    """Направляет чтения view на случайную реплику.
+
+    Только для GET и HEAD. Пользователь, который недавно что-то записал,
+    читает с основной базы, чтобы сразу увидеть свои изменения.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.REPLICA_DATABASES
+                or request.method not in SAFE_METHODS
+                or STICKY_COOKIE in request.COOKIES):
+            return view(request, *args, **kwargs)
+        _state.alias = random.choice(settings.REPLICA_DATABASES)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.alias = None
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтения внутри read_from_replica идут на реплику, остальное — в
+    default. Миграции применяются только к default, реплики копируют его.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = get_replica_alias()
+        if alias is not None and model._meta.app_label in REPLICA_APPS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
+
+
+class StickyPrimaryMiddleware:
+    """После успешного изменяющего запроса ставит cookie, по которой
+    чтения пользователя REPLICA_LAG секунд идут на основную базу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.REPLICA_DATABASES
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            response.set_cookie(STICKY_COOKIE, '1',
+                                max_age=settings.REPLICA_LAG,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,146 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Что сжимать при collectstatic: картинки PNG и ICO уже сжаты.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.json', '.map',
+                           '.xml', '.html')
+COMPRESS_MIN_SIZE = 256
+# Варианты файла по предпочтению: br лучше сжимает, gzip понимают все.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Имя с хэшем, как его строит ManifestStaticFilesStorage: name.<md5[:12]>.ext
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}(\.[^./]+)?$')
+
+
+def compress(path):
+    """Пишет рядом с файлом .gz и .br, если они меньше оригинала."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хэшами в именах и сжатые варианты файлов.
+
+    Пока collectstatic не запускали и манифеста нет, {% static %} отдаёт
+    имена без хэша, как обычное хранилище: так работают тесты и запуск
+    без сборки статики.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if (name.endswith(COMPRESSIBLE_EXTENSIONS)
+                    and self.size(name) >= COMPRESS_MIN_SIZE):
+                compress(self.path(name))
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for value in header.split(','):
+        encoding, _, params = value.partition(';')
+        quality = params.strip().partition('q=')[2]
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT без обращения к view.
+
+    По Accept-Encoding выбирает .br или .gz, если они собраны. Файлы с
+    хэшем в имени кэшируются браузером на год как immutable, остальные —
+    на STATIC_MAX_AGE секунд. Имя проверяется при каждом запросе, так что
+    новый collectstatic не требует перезапуска. Ставится сразу после
+    SecurityMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (settings.STATIC_ROOT and request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(settings.STATIC_URL)):
+            name = request.path_info[len(settings.STATIC_URL):]
+            response = self.serve(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                                  stat.st_mtime, stat.st_size):
+            return self.add_cache_headers(HttpResponseNotModified(), name)
+        content_type, _ = mimetypes.guess_type(path)
+        encoding, served = self.choose_variant(request, path)
+        response = FileResponse(open(served, 'rb'),
+                                content_type=content_type
+                                or 'application/octet-stream')
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return self.add_cache_headers(response, name)
+
+    @staticmethod
+    def add_cache_headers(response, name):
+        response['Vary'] = 'Accept-Encoding'
+        if HASHED_NAME.search(name):
+            max_age = f'{IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            max_age = settings.STATIC_MAX_AGE
+        response['Cache-Control'] = f'public, max-age={max_age}'
+        return response
+
+    @staticmethod
+    def choose_variant(request, path):
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + suffix):
+                return encoding, path + suffix
+        return None, path
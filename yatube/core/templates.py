@@ -0,0 +1,30 @@
+import os
+
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+
+def template_names(directory):
+    """Имена всех .html-шаблонов каталога относительно него."""
+    for root, _, files in os.walk(directory):
+        for file in sorted(files):
+            if file.endswith('.html'):
+                path = os.path.relpath(os.path.join(root, file), directory)
+                yield path.replace(os.sep, '/')
+
+
+def preload_templates():
+    """Разбирает все шаблоны из DIRS движков Django заранее.
+
+    С кэширующим загрузчиком первый запрос к странице не тратит время на
+    разбор base.html, includes и paginator. Возвращает число шаблонов.
+    """
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.engine.dirs:
+            for name in template_names(directory):
+                engine.get_template(name)
+                count += 1
+    return count
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class LocalCacheTestRunner(DiscoverRunner):
+    """Запускает тесты с кэшем в памяти процесса.
+
+    Иначе cache.clear() в тестах очищал бы общий memcached, а записи
+    тестовой базы смешивались бы с записями рабочей.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.local_caches = override_settings(CACHES=settings.LOCAL_CACHES)
+        self.local_caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.local_caches.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,105 @@
+import gzip
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..compression import (CompressionMiddleware, compress_stream,
+                           compression_stats)
+
+
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth', is_staff=True)
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост номер {i} ' * 10)
+            for i in range(15)
+        ])
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        compression_stats.reset()
+
+    def test_page_is_gzipped(self):
+        url = reverse('posts:index')
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        stats = compression_stats.as_dict()
+        self.assertLess(stats['ratio'], 1)
+        self.assertEqual(stats['compressed'], 1)
+
+    def test_cached_page_is_not_compressed_again(self):
+        url = reverse('posts:index')
+        first = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        second = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(compression_stats.cache_hits, 1)
+
+    def test_personal_page_is_not_cached(self):
+        self.client.force_login(self.user)
+        url = reverse('posts:index')
+        self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compression_stats.cache_hits, 0)
+        self.assertEqual(compression_stats.compressed, 2)
+
+    def test_not_compressed(self):
+        url = reverse('posts:index')
+        for encoding in ('', 'identity', 'gzip;q=0'):
+            with self.subTest(encoding=encoding):
+                response = self.client.get(url,
+                                           HTTP_ACCEPT_ENCODING=encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response(self):
+        self.client.force_login(self.user)
+        url = reverse('posts:export')
+        plain = b''.join(self.client.get(url).streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), plain
+        )
+        self.assertEqual(compression_stats.bytes_in, len(plain))
+
+    def test_small_stream_chunks_are_flushed_together(self):
+        chunks = [f'{{"row": {i}}}\n'.encode() for i in range(5000)]
+        with override_settings(COMPRESSION_STREAM_FLUSH_SIZE=16 * 1024):
+            parts = list(compress_stream(iter(chunks), 'gzip'))
+        self.assertLess(len(parts), 10)
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+    def test_no_transform_is_respected(self):
+        def get_response(request):
+            response = HttpResponse('текст ' * 1000)
+            response['Cache-Control'] = 'private, No-Transform'
+            return response
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = CompressionMiddleware(get_response)(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_etag_becomes_weak_and_still_matches(self):
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
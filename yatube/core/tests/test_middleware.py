@@ -0,0 +1,93 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.template.base import Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..metrics import Histogram, request_metrics
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(?P<queries>\d+) queries", '
+    r'tpl;dur=(?P<tpl>[\d.]+), view;dur=[\d.]+, total;dur=[\d.]+'
+)
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(username='staff',
+                                             is_staff=True)
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        request_metrics.reset()
+
+    def test_server_timing_header(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('posts:index'))
+        match = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        self.assertEqual(int(match.group('queries')),
+                         len(context.captured_queries))
+        self.assertGreater(float(match.group('tpl')), 0)
+
+    def test_histograms_by_url_name(self):
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        self.client.get('/admin/login/')
+        metrics = request_metrics.as_dict()
+        self.assertEqual(sorted(metrics), ['about:author', 'posts:index'])
+        self.assertEqual(metrics['posts:index']['total']['count'], 3)
+
+    def test_template_instrumentation_is_removed(self):
+        render = Template.render
+        self.client.get(reverse('posts:index'))
+        self.assertIs(Template.render, render)
+
+    def test_streaming_body_is_recorded(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:export'))
+        self.assertEqual(request_metrics.as_dict(), {})
+        with CaptureQueriesContext(connection) as context:
+            b''.join(response.streaming_content)
+        self.assertGreater(len(context.captured_queries), 0)
+        header = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        queries = request_metrics.as_dict()['posts:export']['queries']
+        self.assertEqual(queries['count'], 1)
+        self.assertEqual(queries['mean'], int(header.group('queries'))
+                         + len(context.captured_queries))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(request_metrics.as_dict(), {})
+
+    def test_metrics_view_is_staff_only(self):
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code,
+                         302)
+        self.client.force_login(self.staff)
+        data = self.client.get(reverse('metrics')).json()
+        self.assertIn('posts:index', data['requests'])
+        self.assertIn('hit_rate', data['cache']['page'])
+
+
+class HistogramTest(TestCase):
+    def test_percentiles(self):
+        histogram = Histogram(buckets=(1, 10, 100))
+        for value in (0.5, 5, 5, 50, 500):
+            histogram.observe(value)
+        self.assertEqual(histogram.percentile(50), 10)
+        self.assertEqual(histogram.percentile(80), 100)
+        self.assertIsNone(histogram.percentile(100))
@@ -0,0 +1,83 @@
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import page_stats
+from posts.models import Post, User
+
+from ..replicas import FENCE_KEY, STICKY_COOKIE, read_from_replica
+from .utils import read_in_other_worker, shared_cache
+
+
+@read_from_replica
+def routing_view(request):
+    return HttpResponse(' '.join(
+        str(alias) for alias in (router.db_for_read(Post),
+                                 router.db_for_read(Session),
+                                 router.db_for_write(Post))
+    ))
+
+
+@override_settings(REPLICA_DATABASES=['replica_1'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_reads_go_to_replica(self):
+        response = routing_view(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica_1 default default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_writes_and_sticky_users_use_primary(self):
+        response = routing_view(self.factory.post('/'))
+        self.assertEqual(response.content, b'default default default')
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        response = routing_view(request)
+        self.assertEqual(response.content, b'default default default')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        response = routing_view(self.factory.get('/'))
+        self.assertEqual(response.content, b'default default default')
+
+
+# Реплика совпадает с основной базой, чтобы страницы работали в тестах.
+@override_settings(REPLICA_DATABASES=['default'])
+class ReplicaStickinessTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_write_makes_user_sticky(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('posts:create_post'),
+                                    {'text': 'Новый пост'})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_lagging_replica_pages_are_not_cached(self):
+        Post.objects.create(author=self.user, text='Пост')
+        self.client.get(reverse('posts:index'))
+        hits = page_stats.hits
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(page_stats.hits, hits)
+        cache.delete(FENCE_KEY)
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(page_stats.hits, hits + 1)
+
+    @shared_cache
+    def test_fence_reaches_other_workers(self):
+        cache.clear()
+        self.assertEqual(read_in_other_worker(FENCE_KEY), 'None')
+        Post.objects.create(author=self.user, text='Пост')
+        self.assertEqual(read_in_other_worker(FENCE_KEY), 'True')
@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import TestCase
+
+
+def read_pragma(db, name):
+    with db.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class SqlitePragmasTest(TestCase):
+    def test_pragmas_are_applied(self):
+        for name in ('busy_timeout', 'cache_size'):
+            with self.subTest(name=name):
+                self.assertEqual(read_pragma(connection, name),
+                                 settings.SQLITE_PRAGMAS[name])
+
+    def test_file_database_uses_wal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            default = connections['default']
+            db = default.__class__(
+                {**default.settings_dict,
+                 'NAME': os.path.join(tmp, 'db.sqlite3')},
+                alias='wal_test'
+            )
+            try:
+                self.assertEqual(read_pragma(db, 'journal_mode'), 'wal')
+            finally:
+                db.close()
@@ -0,0 +1,88 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+from ..staticfiles import IMMUTABLE_MAX_AGE, accepted_encodings
+
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def test_collectstatic_hashes_and_compresses(self):
+        hashed = staticfiles_storage.stored_name(CSS)
+        self.assertNotEqual(hashed, CSS)
+        path = os.path.join(STATIC_ROOT, hashed)
+        with open(path, 'rb') as file, gzip.open(path + '.gz') as packed:
+            self.assertEqual(packed.read(), file.read())
+        self.assertFalse(os.path.exists(
+            os.path.join(STATIC_ROOT, 'css', 'bootstrap.css')
+        ))
+        self.assertTrue(static(CSS).endswith(hashed))
+
+    def test_hashed_file_is_immutable_and_negotiated(self):
+        url = static(CSS)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+        plain = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(gzip.decompress(b''.join(response)),
+                         b''.join(plain))
+
+    def test_unhashed_file_has_short_cache(self):
+        response = self.client.get(settings.STATIC_URL + CSS)
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={settings.STATIC_MAX_AGE}')
+
+    def test_missing_and_outside_files_fall_through(self):
+        for url in (settings.STATIC_URL + 'css/missing.css',
+                    settings.STATIC_URL + '../manage.py'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_not_modified(self):
+        url = static(CSS)
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+
+    def test_files_collected_later_are_immutable(self):
+        self.client.get(static(CSS))
+        name = 'css/later.0123456789ab.css'
+        hashed = staticfiles_storage.stored_name(CSS)
+        shutil.copy(os.path.join(STATIC_ROOT, hashed),
+                    os.path.join(STATIC_ROOT, name))
+        response = self.client.get(settings.STATIC_URL + name)
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br;q=0.5'),
+                         {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('br;q=0, gzip'), {'gzip'})
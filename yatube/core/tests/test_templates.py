@@ -0,0 +1,79 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+from ..templates import preload_templates
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def with_loaders(loaders):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+# Без DEBUG Django сам включает кэширующий загрузчик, поэтому обычный
+# загрузчик в тестах задаётся явно.
+INTERPRETED_TEMPLATES = with_loaders(LOADERS)
+CACHED_TEMPLATES = with_loaders(
+    [('django.template.loaders.cached.Loader', LOADERS)]
+)
+
+
+class PrecompiledTemplatesTest(TestCase):
+    """Кэширующий загрузчик отдаёт те же байты, что и обычный."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Post.objects.bulk_create([
+            Post(author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(15)
+        ])
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.user.username,)),
+        )
+
+    def render_pages(self):
+        pages = []
+        for url in self.urls:
+            cache.clear()
+            pages.append(self.client.get(url).content)
+        return pages
+
+    def test_output_is_identical(self):
+        with override_settings(TEMPLATES=INTERPRETED_TEMPLATES):
+            interpreted = self.render_pages()
+        with override_settings(TEMPLATES=CACHED_TEMPLATES):
+            preload_templates()
+            precompiled = self.render_pages()
+        for url, expected, content in zip(self.urls, interpreted,
+                                          precompiled):
+            with self.subTest(url=url):
+                self.assertEqual(content, expected)
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_preload_fills_cached_loader(self):
+        self.assertGreater(preload_templates(), 0)
+        loader = engines['django'].engine.template_loaders[0]
+        for name in ('base.html', 'includes/post.html',
+                     'posts/includes/paginator.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, loader.get_template_cache)
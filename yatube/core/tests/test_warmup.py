@@ -0,0 +1,36 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase
+
+from ..warmup import warm_up
+
+
+class WarmupTest(TestCase):
+    def test_all_steps_are_timed(self):
+        timings = warm_up()
+        self.assertEqual([name for name, _ in timings],
+                         list(settings.WARMUP_STEPS))
+        for name, elapsed in timings:
+            with self.subTest(step=name):
+                self.assertGreaterEqual(elapsed, 0)
+
+    def test_database_step_opens_only_default(self):
+        with patch('core.warmup.connections') as mocked:
+            warm_up(['database'])
+        mocked.__getitem__.assert_called_once_with(DEFAULT_DB_ALIAS)
+
+    def test_command_reports_steps(self):
+        out = StringIO()
+        call_command('warmup', 'urls', 'templates', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('urls'))
+        self.assertTrue(lines[1].startswith('templates'))
+        self.assertIn('всего', lines[2])
+
+    def test_unknown_step(self):
+        with self.assertRaises(CommandError):
+            call_command('warmup', 'nope')
@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.utils.module_loading import import_string
+
+SHARED_CACHE_DIR = tempfile.TemporaryDirectory(prefix='yatube-cache-')
+# Кэш вне процесса, как общий memcached у нескольких воркеров.
+shared_cache = override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_CACHE_DIR.name,
+    }
+})
+READ_CACHE = (
+    'import json, sys; '
+    'from django.utils.module_loading import import_string; '
+    'params = json.loads(sys.argv[1]); '
+    "cache = import_string(params['BACKEND'])(params['LOCATION'], params); "
+    'print(repr(cache.get(sys.argv[2])))'
+)
+
+
+def other_worker_cache():
+    """Отдельное подключение к кэшу, как у другого воркера."""
+    params = settings.CACHES['default']
+    backend = import_string(params['BACKEND'])
+    return backend(params['LOCATION'], params)
+
+
+def read_in_other_worker(key):
+    """Значение ключа кэша, прочитанное в отдельном процессе."""
+    result = subprocess.run(
+        [sys.executable, '-c', READ_CACHE,
+         json.dumps(settings.CACHES['default']), key],
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
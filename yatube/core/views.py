@@ -1,5 +1,12 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from posts.cache import page_stats, post_card_stats
+
+from .compression import compression_stats
+from .metrics import request_metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +22,16 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def metrics(request):
+    """Гистограммы времени запросов, счётчики кэшей и сжатия процесса."""
+    return JsonResponse({
+        'requests': request_metrics.as_dict(),
+        'cache': {
+            'post_card': post_card_stats.as_dict(),
+            'page': page_stats.as_dict(),
+        },
+        'compression': compression_stats.as_dict(),
+    })
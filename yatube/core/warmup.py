@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+from django.utils.functional import empty
+
+from .templates import preload_templates
+
+
+def _populate(resolver):
+    # Свойство заполняет словари для reverse при первом обращении.
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            _populate(pattern)
+
+
+def warm_urls():
+    """Импортирует все views и строит словари резолвера для reverse."""
+    with translation.override(settings.LANGUAGE_CODE):
+        _populate(get_resolver())
+
+
+def warm_translations():
+    """Загружает каталоги переводов LANGUAGE_CODE."""
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('Home')
+
+
+def warm_templates():
+    """Создаёт движки, импортирует библиотеки тегов и разбирает шаблоны."""
+    preload_templates()
+
+
+def warm_thumbnails():
+    """Создаёт движок, хранилище и kvstore sorl и плагины Pillow."""
+    from PIL import Image
+    from sorl.thumbnail import default
+
+    for lazy in (default.backend, default.kvstore, default.engine,
+                 default.storage):
+        if lazy._wrapped is empty:
+            lazy._setup()
+    Image.init()
+
+
+def warm_database():
+    """Открывает соединение с основной базой; при CONN_MAX_AGE его
+    подхватит первый запрос. Реплику каждый запрос выбирает случайно,
+    поэтому их соединения открываются по мере надобности.
+
+    Не включать, если приложение загружается до fork (gunicorn
+    --preload): соединение SQLite нельзя делить между процессами.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+STEPS = {
+    'urls': warm_urls,
+    'translations': warm_translations,
+    'templates': warm_templates,
+    'thumbnails': warm_thumbnails,
+    'database': warm_database,
+}
+
+
+def warm_up(steps=None):
+    """Выполняет шаги прогрева (по умолчанию WARMUP_STEPS) по порядку.
+
+    Возвращает список пар (шаг, секунды).
+    """
+    timings = []
+    for name in settings.WARMUP_STEPS if steps is None else steps:
+        started = time.perf_counter()
+        STEPS[name]()
+        timings.append((name, time.perf_counter() - started))
+    return timings
+
+
+def format_timings(timings):
+    total = sum(elapsed for _, elapsed in timings)
+    steps = ', '.join(f'{name} {elapsed * 1000:.1f} мс'
+                      for name, elapsed in timings)
+    return f'{steps}; всего {total * 1000:.1f} мс'
@@ -1,14 +1,81 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
+from .cache import get_group_choices
 from .models import Post, Group
+from .search import filter_by_text
+
+
+def estimate_rows(queryset):
+    """Число строк таблицы по статистике ANALYZE или None.
+
+    Статистику SQLite собирает ANALYZE (или PRAGMA optimize), чтение
+    sqlite_stat1 не зависит от размера таблицы.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        )
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(
+            'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return int(row[0].split()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает COUNT(*) по всей таблице.
+
+    Для списка без фильтров берётся оценка из статистики базы. Маленьким
+    оценкам не доверяем: при малом count changelist выводит все строки
+    без LIMIT, поэтому тогда выполняется точный подсчёт.
+    """
+    min_estimate = 1000
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimate_rows(self.object_list)
+            if estimate is not None and estimate >= self.min_estimate:
+                return estimate
+        return super().count
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        return filter_by_text(queryset, search_term), False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request,
+                                                     **kwargs)
+        if db_field.name == 'group':
+            # Поле копируется в каждую строку changelist вместе со списком,
+            # так что группы не запрашиваются заново для каждой строки.
+            choices = get_group_choices()
+            if formfield.empty_label is not None:
+                choices = [('', formfield.empty_label)] + choices
+            formfield.choices = choices
+        return formfield
 
 
 admin.site.register(Post, PostAdmin)
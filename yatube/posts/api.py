@@ -0,0 +1,166 @@
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+
+from core.replicas import read_from_replica
+
+from .cache import cache_anonymous_page
+from .conditional import (conditional_page, group_last_modified,
+                          index_last_modified, post_last_modified,
+                          profile_last_modified)
+from .models import Group, Post, User
+from .utils import LATEST_POSTS_COUNT, CursorPaginator
+
+API_MAX_LIMIT = 100
+# Поле ответа -> поле запроса values_list().
+API_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+# Ключ курсора читается всегда, даже если его нет в fields.
+CURSOR_LOOKUPS = ('pk', 'pub_date')
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+API_CONVERTERS = {
+    'image': _image_url,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def get_fields(request):
+    """Поля ответа из параметра fields, по умолчанию все."""
+    value = request.GET.get('fields')
+    if not value:
+        return list(API_FIELDS)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in API_FIELDS]
+    if unknown or not fields:
+        raise ApiError(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(API_FIELDS)}.'
+        )
+    return fields
+
+
+def get_limit(request):
+    value = request.GET.get('limit')
+    if not value:
+        return LATEST_POSTS_COUNT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError('limit должен быть числом.')
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def select_rows(posts, fields):
+    """values_list только с нужными столбцами и ключом курсора."""
+    lookups = list(CURSOR_LOOKUPS)
+    lookups.extend(API_FIELDS[name] for name in fields
+                   if API_FIELDS[name] not in lookups)
+    return posts.values_list(*lookups, named=True)
+
+
+def serialize_row(row, fields):
+    record = {}
+    for name in fields:
+        value = getattr(row, API_FIELDS[name])
+        converter = API_CONVERTERS.get(name)
+        record[name] = converter(value) if converter else value
+    return record
+
+
+def _page_url(request, **cursor):
+    params = {name: request.GET[name] for name in ('fields', 'limit')
+              if name in request.GET}
+    params.update(cursor)
+    return f'{request.path}?{urlencode(params)}'
+
+
+def api_view(view):
+    """Превращает ApiError из view в JSON-ответ с кодом ошибки."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'detail': error.message},
+                                status=error.status)
+    return wrapper
+
+
+def posts_response(request, posts):
+    """Страница ленты по курсору в виде JSON."""
+    fields = get_fields(request)
+    paginator = CursorPaginator(select_rows(posts, fields),
+                                get_limit(request))
+    page_obj = paginator.get_cursor_page(after=request.GET.get('after'),
+                                         before=request.GET.get('before'))
+    return JsonResponse({
+        'results': [serialize_row(row, fields) for row in page_obj],
+        'next': (_page_url(request, after=page_obj.next_cursor)
+                 if page_obj.has_next() else None),
+        'previous': (_page_url(request, before=page_obj.previous_cursor)
+                     if page_obj.has_previous() else None),
+    })
+
+
+def _get_pk(queryset, **lookup):
+    pk = queryset.filter(**lookup).values_list('pk', flat=True).first()
+    if pk is None:
+        raise ApiError('Не найдено.', status=404)
+    return pk
+
+
+@read_from_replica
+@conditional_page(index_last_modified, 'index')
+@cache_anonymous_page('index')
+@api_view
+def index(request):
+    return posts_response(request, Post.objects.all())
+
+
+@read_from_replica
+@conditional_page(group_last_modified, 'group:{slug}')
+@cache_anonymous_page('group:{slug}')
+@api_view
+def group_posts(request, slug):
+    group_id = _get_pk(Group.objects, slug=slug)
+    return posts_response(request, Post.objects.filter(group_id=group_id))
+
+
+@read_from_replica
+@conditional_page(profile_last_modified, 'profile:{username}')
+@cache_anonymous_page('profile:{username}')
+@api_view
+def profile(request, username):
+    author_id = _get_pk(User.objects, username=username)
+    return posts_response(request, Post.objects.filter(author_id=author_id))
+
+
+@read_from_replica
+@conditional_page(post_last_modified)
+@api_view
+def post_detail(request, post_id):
+    fields = get_fields(request)
+    row = select_rows(Post.objects.filter(pk=post_id), fields).first()
+    if row is None:
+        raise ApiError('Не найдено.', status=404)
+    return JsonResponse(serialize_row(row, fields))
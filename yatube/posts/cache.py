@@ -0,0 +1,161 @@
+import time
+from functools import wraps
+from threading import Lock
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core.compression import share_compressed
+from core.replicas import fence_replicas, get_replica_alias, replicas_may_lag
+
+from .models import Group
+
+POST_CARD_TEMPLATE = 'includes/post.html'
+POST_CARD_VERSION = 1
+POST_CARD_TIMEOUT = 60 * 60
+PAGE_CACHE_VERSION = 1
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_QUERY_PARAMS = ('after', 'before', 'page', 'fields', 'limit')
+GROUP_CHOICES_KEY = 'group_choices'
+GROUP_CHOICES_TIMEOUT = 60 * 60
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша в пределах процесса."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+post_card_stats = CacheStats()
+page_stats = CacheStats()
+
+
+def post_card_key(post_id):
+    return f'post_card:{POST_CARD_VERSION}:{post_id}'
+
+
+def invalidate_post_card(post_id):
+    cache.delete(post_card_key(post_id))
+
+
+def invalidate_post_cards(post_ids):
+    cache.delete_many([post_card_key(post_id) for post_id in post_ids])
+
+
+def get_group_choices():
+    """Пары (id, название) всех групп для выпадающих списков.
+
+    Список общий для всех строк и запросов, поэтому группы читаются из
+    базы один раз до следующего изменения.
+    """
+    choices = cache.get(GROUP_CHOICES_KEY)
+    if choices is None:
+        choices = list(Group.objects.values_list('pk', 'title'))
+        cache.set(GROUP_CHOICES_KEY, choices, GROUP_CHOICES_TIMEOUT)
+    return choices
+
+
+def invalidate_group_choices():
+    cache.delete(GROUP_CHOICES_KEY)
+
+
+def _scope_version_key(scope):
+    return f'page_version:{scope}'
+
+
+def get_scope_version(scope):
+    key = _scope_version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_pages(*scopes):
+    """Сбрасывает кэш страниц для областей вида group:<slug>.
+
+    Версия области меняется на новую, старые записи просто истекают.
+    """
+    version = time.time_ns()
+    cache.set_many(
+        {_scope_version_key(scope): version for scope in scopes}, None
+    )
+    fence_replicas()
+
+
+def get_page_scopes(post):
+    """Области кэша страниц, на которых виден пост."""
+    scopes = ['index', f'profile:{post.author.username}']
+    if post.group_id is not None:
+        scopes.append(f'group:{post.group.slug}')
+    old_username = getattr(post, '_old_username', None)
+    if old_username is not None:
+        scopes.append(f'profile:{old_username}')
+    old_group_slug = getattr(post, '_old_group_slug', None)
+    if old_group_slug is not None:
+        scopes.append(f'group:{old_group_slug}')
+    return scopes
+
+
+def page_cache_key(scope, request):
+    params = urlencode([(name, request.GET[name])
+                        for name in PAGE_QUERY_PARAMS
+                        if name in request.GET])
+    return (f'page:{PAGE_CACHE_VERSION}:{scope}:{get_scope_version(scope)}:'
+            f'{request.path}?{params}')
+
+
+def cache_anonymous_page(scope):
+    """Кэширует страницу для анонимных пользователей.
+
+    scope задаёт область инвалидации и форматируется аргументами view,
+    например 'group:{slug}'. Одна область может быть у нескольких
+    адресов, например у страницы группы и её ленты.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            key = page_cache_key(scope.format(**kwargs), request)
+            cached = cache.get(key)
+            if cached is not None:
+                page_stats.hit()
+                content_type, content = cached
+                return share_compressed(
+                    HttpResponse(content, content_type=content_type)
+                )
+            page_stats.miss()
+            response = view(request, *args, **kwargs)
+            # Пока реплика может отставать, её ответ не кэшируется под
+            # новой версией области.
+            stale = get_replica_alias() is not None and replicas_may_lag()
+            if response.status_code == 200:
+                share_compressed(response)
+                if not stale:
+                    cache.set(key, (response['Content-Type'],
+                                    response.content), PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,83 @@
+import datetime
+import hashlib
+
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from .cache import PAGE_QUERY_PARAMS, get_scope_version
+from .models import Post
+
+
+def _last_modified(posts):
+    return (posts.order_by()
+            .aggregate(last_modified=Max('updated'))['last_modified'])
+
+
+def index_last_modified():
+    return _last_modified(Post.objects.all())
+
+
+def group_last_modified(slug):
+    return _last_modified(Post.objects.filter(group__slug=slug))
+
+
+def profile_last_modified(username):
+    return _last_modified(Post.objects.filter(author__username=username))
+
+
+def post_last_modified(post_id):
+    """Время изменения и область кэша страницы поста.
+
+    Страница выводит и число постов автора, поэтому учитываются все его
+    посты, а область — профиль автора: её версия меняется и при
+    удалении другого его поста.
+    """
+    result = (Post.objects.filter(author__posts=post_id).order_by()
+              .aggregate(last_modified=Max('updated'),
+                         username=Max('author__username')))
+    if result['username'] is None:
+        return None, None
+    return result['last_modified'], f'profile:{result["username"]}'
+
+
+def _version_time(version):
+    return datetime.datetime.fromtimestamp(version / 10 ** 9,
+                                           datetime.timezone.utc)
+
+
+def conditional_page(last_modified, scope=None):
+    """Отвечает 304 до выполнения view, если страница не менялась.
+
+    last_modified получает аргументы view и возвращает время последнего
+    изменения постов на странице. Если scope не задан, last_modified
+    возвращает пару (время, область). Удаление поста не меняет
+    MAX(updated), поэтому Last-Modified берётся не раньше смены версии
+    области кэша страниц. ETag дополнительно учитывает пользователя,
+    параметры страницы и саму версию.
+    """
+    def get_validators(request, **kwargs):
+        if not hasattr(request, '_posts_validators'):
+            if scope is None:
+                modified, page_scope = last_modified(**kwargs)
+            else:
+                modified = last_modified(**kwargs)
+                page_scope = scope.format(**kwargs)
+            version = None
+            if modified is not None:
+                version = get_scope_version(page_scope)
+                modified = max(modified, _version_time(version))
+            request._posts_validators = modified, version
+        return request._posts_validators
+
+    def get_last_modified(request, **kwargs):
+        return get_validators(request, **kwargs)[0]
+
+    def get_etag(request, **kwargs):
+        modified, version = get_validators(request, **kwargs)
+        if modified is None:
+            return None
+        parts = [request.user.pk, modified.isoformat(), version]
+        parts.extend(request.GET.get(name) for name in PAGE_QUERY_PARAMS)
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+    return condition(etag_func=get_etag, last_modified_func=get_last_modified)
@@ -0,0 +1,64 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Group, Post
+
+
+def change_author_count(user_id, delta):
+    updated = AuthorStats.objects.filter(user_id=user_id).update(
+        posts_count=F('posts_count') + delta
+    )
+    if updated or delta < 0:
+        return
+    _, created = AuthorStats.objects.get_or_create(
+        user_id=user_id, defaults={'posts_count': delta}
+    )
+    if not created:
+        change_author_count(user_id, delta)
+
+
+def change_group_count(group_id, delta):
+    if group_id is None:
+        return
+    Group.objects.filter(pk=group_id).update(
+        posts_count=F('posts_count') + delta
+    )
+
+
+def get_posts_count(user):
+    stats = getattr(user, 'stats', None)
+    return stats.posts_count if stats else 0
+
+
+def _count_posts(**filters):
+    posts = (Post.objects.filter(**filters)
+             .order_by()
+             .values(*filters)
+             .annotate(total=Count('pk'))
+             .values('total'))
+    return Coalesce(Subquery(posts), 0)
+
+
+def recount_posts(user_ids=None, group_ids=None):
+    """Пересчитывает счётчики постов по таблице постов.
+
+    Без аргументов обходит всех авторов и все группы.
+    Возвращает число обновлённых записей авторов и групп.
+    """
+    authors = Post.objects.order_by().values_list('author_id', flat=True)
+    if user_ids is not None:
+        authors = authors.filter(author_id__in=user_ids)
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=user_id) for user_id in authors.distinct()],
+        ignore_conflicts=True
+    )
+    stats = AuthorStats.objects.all()
+    groups = Group.objects.all()
+    if user_ids is not None:
+        stats = stats.filter(user_id__in=user_ids)
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    return (
+        stats.update(posts_count=_count_posts(author=OuterRef('user_id'))),
+        groups.update(posts_count=_count_posts(group=OuterRef('pk'))),
+    )
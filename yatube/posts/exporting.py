@@ -0,0 +1,93 @@
+import csv
+import datetime
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Post
+
+EXPORT_CHUNK_SIZE = 2000
+# Поля выгрузки совпадают с форматом import_posts.
+EXPORT_FIELDS = ('id', 'text', 'author', 'group', 'pub_date', 'image')
+EXPORT_COLUMNS = ('pk', 'text', 'author__username', 'group__slug',
+                  'pub_date', 'image')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def parse_bound(value):
+    """Граница диапазона дат: дата-время ISO 8601 или просто дата."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def get_export_filters(params):
+    """Аргументы export_rows из параметров запроса или команды.
+
+    Для неразборчивой даты выбрасывает ValueError.
+    """
+    filters = {name: params.get(name) or None for name in ('group', 'author')}
+    for name in ('since', 'until'):
+        value = params.get(name)
+        filters[name] = parse_bound(value) if value else None
+    return filters
+
+
+def export_rows(group=None, author=None, since=None, until=None,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """Кортежи постов в порядке публикации, прочитанные порциями.
+
+    since включается в диапазон, until — нет. Посты не превращаются в
+    объекты модели и не кэшируются в queryset.
+    """
+    posts = Post.objects.order_by('pub_date', 'pk')
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    if since:
+        posts = posts.filter(pub_date__gte=since)
+    if until:
+        posts = posts.filter(pub_date__lt=until)
+    return posts.values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+
+
+def _as_record(row):
+    record = dict(zip(EXPORT_FIELDS, row))
+    record['pub_date'] = record['pub_date'].isoformat()
+    return record
+
+
+def write_jsonl(rows):
+    for row in rows:
+        yield json.dumps(_as_record(row), ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def write_csv(rows):
+    writer = csv.DictWriter(Echo(), EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(_as_record(row))
+
+
+WRITERS = {
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+}
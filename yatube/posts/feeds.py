@@ -0,0 +1,134 @@
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from core.replicas import read_from_replica
+
+from .cache import cache_anonymous_page
+from .conditional import (conditional_page, group_last_modified,
+                          index_last_modified, profile_last_modified)
+from .models import Group, Post, User
+
+FEED_ITEMS_COUNT = 20
+FEED_TITLE_LENGTH = 50
+# Только поля, которые попадают в запись ленты.
+FEED_FIELDS = ('text', 'pub_date', 'updated', 'author__username',
+               'author__first_name', 'author__last_name', 'group__title')
+
+
+def _author_name(user):
+    return user.get_full_name() or user.username
+
+
+def _feed_items(posts):
+    return (posts.select_related('author', 'group')
+            .only(*FEED_FIELDS)[:FEED_ITEMS_COUNT])
+
+
+class PostsFeed(Feed):
+    """Общая часть лент: записи из постов, items() — у каждой ленты."""
+
+    def item_title(self, post):
+        return Truncator(post.text).chars(FEED_TITLE_LENGTH)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=(post.pk,))
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.updated
+
+    def item_author_name(self, post):
+        return _author_name(post.author)
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group_id else ()
+
+
+class IndexFeed(PostsFeed):
+    title = 'Последние обновления'
+    description = 'Новые посты всех авторов Yatube.'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return _feed_items(Post.objects.all())
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return Group.objects.get(slug=slug)
+
+    def title(self, group):
+        return group.title
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def items(self, group):
+        return _feed_items(group.posts.all())
+
+
+class ProfileFeed(PostsFeed):
+    def get_object(self, request, username):
+        return User.objects.only('username', 'first_name',
+                                 'last_name').get(username=username)
+
+    def title(self, author):
+        return f'Посты {_author_name(author)}'
+
+    def description(self, author):
+        return f'Новые посты автора {_author_name(author)} в Yatube.'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def items(self, author):
+        return _feed_items(author.posts.all())
+
+
+class IndexAtomFeed(IndexFeed):
+    feed_type = Atom1Feed
+    subtitle = IndexFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+    subtitle = GroupFeed.description
+
+
+class ProfileAtomFeed(ProfileFeed):
+    feed_type = Atom1Feed
+    subtitle = ProfileFeed.description
+
+
+def cached_feed(feed, last_modified, scope):
+    """Лента с кэшем и условным GET в той же области, что и её страница.
+
+    Запись поста сбрасывает кэш и страницы, и ленты, а повторный опрос
+    без изменений обходится одним запросом MAX(updated) по индексу.
+    """
+    return read_from_replica(conditional_page(last_modified, scope)(
+        cache_anonymous_page(scope)(feed)
+    ))
+
+
+index_rss = cached_feed(IndexFeed(), index_last_modified, 'index')
+index_atom = cached_feed(IndexAtomFeed(), index_last_modified, 'index')
+group_rss = cached_feed(GroupFeed(), group_last_modified, 'group:{slug}')
+group_atom = cached_feed(GroupAtomFeed(), group_last_modified,
+                         'group:{slug}')
+profile_rss = cached_feed(ProfileFeed(), profile_last_modified,
+                          'profile:{username}')
+profile_atom = cached_feed(ProfileAtomFeed(), profile_last_modified,
+                           'profile:{username}')
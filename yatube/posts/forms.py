@@ -1,9 +1,11 @@
 from django import forms
 
 from .models import Post
+from .uploads import PostImageField
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
+        field_classes = {'image': PostImageField}
@@ -0,0 +1,181 @@
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Max, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate_pages, invalidate_post_cards
+from .counters import change_author_count, change_group_count
+from .models import Group, Post, User
+
+CHUNK_SIZE = 5000
+BATCH_SIZE = 500
+
+
+def read_jsonl(file):
+    """Записи из файла JSON Lines, битые строки превращаются в None."""
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+def read_csv(file):
+    """Записи из CSV с заголовком text,author,group,pub_date,image."""
+    yield from csv.DictReader(file)
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+class LookupMap:
+    """Словарь ключ -> id, который дочитывает из базы только новые ключи.
+
+    Неизвестные ключи запоминаются как None, чтобы не спрашивать о них
+    повторно. Размер зависит от числа авторов и групп, а не постов.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if not missing:
+            return
+        found = dict(self.queryset.filter(**{f'{self.field}__in': missing})
+                     .values_list(self.field, 'pk'))
+        for key in missing:
+            self.ids[key] = found.get(key)
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+def _chunks(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_date(value, now):
+    if not value:
+        return now
+    pub_date = parse_datetime(value)
+    if pub_date is None:
+        raise ValueError(value)
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def _build_post(record, authors, groups, now):
+    if not record or not record.get('text'):
+        return None
+    author_id = authors.get(record.get('author'))
+    group_slug = record.get('group')
+    group_id = groups.get(group_slug) if group_slug else None
+    if author_id is None or (group_slug and group_id is None):
+        return None
+    try:
+        pub_date = _parse_date(record.get('pub_date'), now)
+    except ValueError:
+        return None
+    return Post(text=record['text'], author_id=author_id, group_id=group_id,
+                pub_date=pub_date, updated=now,
+                image=record.get('image') or '')
+
+
+class _RawInsertQuerySet(QuerySet):
+    """bulk_create без pre_save полей, как при loaddata.
+
+    Иначе auto_now_add заменил бы pub_date из файла.
+    """
+
+    def _insert(self, *args, **kwargs):
+        return super()._insert(*args, raw=True, **kwargs)
+
+
+def _last_pk():
+    return Post.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def _create_posts(posts, batch_size):
+    """Вставляет посты с их pub_date и updated, возвращает их id.
+
+    SQLite не возвращает id из bulk_create, тогда это все id после
+    прежнего максимума: чужие id среди них безвредны для сброса карточек.
+    """
+    last_pk = _last_pk()
+    _RawInsertQuerySet(Post).bulk_create(posts, batch_size=batch_size)
+    if posts and posts[0].pk is not None:
+        return [post.pk for post in posts]
+    return range(last_pk + 1, _last_pk() + 1)
+
+
+def import_posts(records, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE,
+                 on_chunk=None):
+    """Загружает посты из записей вида {'text', 'author', 'group', ...}.
+
+    author и group задаются username и slug. Каждая порция из chunk_size
+    записей вставляется через bulk_create в своей транзакции вместе с
+    изменением счётчиков, поэтому прерванный импорт не портит их.
+    Записи с неизвестным автором или группой пропускаются.
+    Возвращает число созданных и пропущенных постов.
+    """
+    authors = LookupMap(User.objects.all(), 'username')
+    groups = LookupMap(Group.objects.all(), 'slug')
+    created = skipped = 0
+    for chunk in _chunks(records, chunk_size):
+        authors.resolve(record.get('author') for record in chunk if record)
+        groups.resolve(record.get('group') for record in chunk if record)
+        now = timezone.now()
+        posts = []
+        for record in chunk:
+            post = _build_post(record, authors, groups, now)
+            if post is None:
+                skipped += 1
+            else:
+                posts.append(post)
+        author_counts = Counter(post.author_id for post in posts)
+        group_counts = Counter(post.group_id for post in posts)
+        with transaction.atomic():
+            post_ids = _create_posts(posts, batch_size)
+            for author_id, count in author_counts.items():
+                change_author_count(author_id, count)
+            for group_id, count in group_counts.items():
+                change_group_count(group_id, count)
+        created += len(posts)
+        # Карточки с теми же id могли остаться от прежней базы.
+        invalidate_post_cards(post_ids)
+        _invalidate_chunk_pages(chunk, posts)
+        if on_chunk is not None:
+            on_chunk(created, skipped)
+    return created, skipped
+
+
+def _invalidate_chunk_pages(chunk, posts):
+    if not posts:
+        return
+    usernames = {record['author'] for record in chunk
+                 if record and record.get('author')}
+    slugs = {record['group'] for record in chunk
+             if record and record.get('group')}
+    invalidate_pages('index',
+                     *(f'profile:{username}' for username in usernames),
+                     *(f'group:{slug}' for slug in slugs))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import (EXPORT_CHUNK_SIZE, WRITERS, export_rows,
+                             get_export_filters)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты в JSON Lines или CSV в формате import_posts. '
+            'Память не зависит от числа постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Путь к файлу, по умолчанию stdout.')
+        parser.add_argument('--format', choices=sorted(WRITERS),
+                            default='jsonl')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--author', help='Username автора.')
+        parser.add_argument('--since', help='Не раньше этой даты.')
+        parser.add_argument('--until', help='Раньше этой даты.')
+        parser.add_argument('--chunk-size', type=int,
+                            default=EXPORT_CHUNK_SIZE,
+                            help='Строк в одной выборке из базы.')
+
+    def handle(self, *args, **options):
+        try:
+            filters = get_export_filters(options)
+        except ValueError as error:
+            raise CommandError(f'Неверный формат даты: {error}')
+        rows = export_rows(chunk_size=options['chunk_size'], **filters)
+        lines = WRITERS[options['format']](rows)
+        if options['path'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        try:
+            file = open(options['path'], 'w', encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with file:
+            file.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(
+            f'Посты выгружены в {options["path"]}.'
+        ))
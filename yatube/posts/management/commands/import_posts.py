@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import BATCH_SIZE, CHUNK_SIZE, READERS, import_posts
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты из файла JSON Lines или CSV с полями text, '
+            'author (username), group (slug), pub_date и image.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу или - для stdin.')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='Формат файла, по умолчанию по расширению.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Записей в одной транзакции.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Строк в одном INSERT.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            file_format = os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(
+                'Укажите формат файла: --format jsonl или --format csv.'
+            )
+        started = time.monotonic()
+
+        def report(created, skipped):
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'Создано {created}, пропущено {skipped}, '
+                    f'{self.rate(created + skipped, started)} строк/с'
+                )
+
+        if path == '-':
+            created, skipped = self.run(sys.stdin, file_format, options,
+                                        report)
+        else:
+            try:
+                file = open(path, encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+            with file:
+                created, skipped = self.run(file, file_format, options,
+                                            report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {created}, пропущено: {skipped}, '
+            f'{self.rate(created + skipped, started)} строк/с.'
+        ))
+
+    def run(self, file, file_format, options, report):
+        return import_posts(READERS[file_format](file),
+                            chunk_size=options['chunk_size'],
+                            batch_size=options['batch_size'],
+                            on_chunk=report)
+
+    @staticmethod
+    def rate(rows, started):
+        elapsed = time.monotonic() - started
+        return round(rows / elapsed) if elapsed else rows
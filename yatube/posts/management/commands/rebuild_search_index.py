@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import (drop_search_index, install_search_index,
+                          search_supported)
+
+
+class Command(BaseCommand):
+    help = ('Пересоздаёт полнотекстовый индекс постов и его триггеры. '
+            'Нужен после миграций, пересоздающих таблицу posts_post.')
+
+    def handle(self, *args, **options):
+        if not search_supported():
+            self.stdout.write('База данных не поддерживает FTS5.')
+            return
+        drop_search_index()
+        install_search_index()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересоздан.'))
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_posts_count(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    authors = (Post.objects.order_by().values('author_id')
+               .annotate(total=models.Count('pk')))
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=row['author_id'], posts_count=row['total'])
+         for row in authors]
+    )
+    groups = (Post.objects.order_by().exclude(group=None).values('group_id')
+              .annotate(total=models.Count('pk')))
+    for row in groups:
+        Group.objects.filter(pk=row['group_id']).update(
+            posts_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_post_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(fill_posts_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from posts.search import drop_search_index, install_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def drop(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, drop),
+    ]
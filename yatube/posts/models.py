@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
@@ -8,14 +8,33 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
 
 
+class AuthorStats(models.Model):
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                related_name='stats')
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     group = models.ForeignKey(Group,
                               blank=True,
@@ -30,6 +49,72 @@ class Post(models.Model):
     class Meta:
         ordering = ['-pub_date']
         default_related_name = 'posts'
+        indexes = [
+            models.Index(fields=['pub_date'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['updated'],
+                         name='post_updated_idx'),
+            models.Index(fields=['group', 'updated'],
+                         name='post_group_updated_idx'),
+            models.Index(fields=['author', 'updated'],
+                         name='post_author_updated_idx'),
+        ]
 
     def __str__(self):
         return self.text[0:15]
+
+    def save(self, *args, **kwargs):
+        """Сохраняет пост и меняет счётчики постов в одной транзакции.
+
+        Прежние автор и группа читаются с блокировкой строки поста,
+        поэтому параллельная правка не переносит пост дважды.
+        """
+        from .counters import change_author_count, change_group_count
+
+        with transaction.atomic():
+            adding = self._state.adding
+            old = None
+            if not adding:
+                old = (Post.objects.select_for_update()
+                       .filter(pk=self.pk)
+                       .values_list('author_id', 'group_id', 'image')
+                       .first())
+            (self._old_author_id, self._old_group_id,
+             self._old_image) = old or (None, None, None)
+            self._old_username = self._old_group_slug = None
+            if self._old_author_id not in (None, self.author_id):
+                self._old_username = (
+                    User.objects.filter(pk=self._old_author_id)
+                    .values_list('username', flat=True)
+                    .first()
+                )
+            if self._old_group_id not in (None, self.group_id):
+                self._old_group_slug = (
+                    Group.objects.filter(pk=self._old_group_id)
+                    .values_list('slug', flat=True)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            if adding:
+                change_author_count(self.author_id, 1)
+                change_group_count(self.group_id, 1)
+                return
+            if self._old_author_id != self.author_id:
+                change_author_count(self._old_author_id, -1)
+                change_author_count(self.author_id, 1)
+            if self._old_group_id != self.group_id:
+                change_group_count(self._old_group_id, -1)
+                change_group_count(self.group_id, 1)
+
+    def delete(self, *args, **kwargs):
+        """Удаляет пост в транзакции вместе с изменением счётчиков.
+
+        Счётчики уменьшает обработчик post_delete: он вызывается и при
+        каскадном удалении постов, и при удалении через QuerySet.
+        """
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
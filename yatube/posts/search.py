@@ -0,0 +1,157 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+SEARCH_TABLE = 'posts_post_fts'
+SEARCH_SCHEMA = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+SEARCH_DROP = (
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+)
+MATCH_SQL = f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+
+
+def search_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_search_index(using=connection):
+    """Создаёт индекс FTS5 с триггерами и заполняет его из posts_post.
+
+    Пересоздание таблицы posts_post миграцией SQLite удаляет триггеры,
+    поэтому после каждого migrate их проверяет ensure_search_index.
+    """
+    if not search_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in SEARCH_SCHEMA:
+            cursor.execute(statement)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def ensure_search_index(using=connection):
+    """Возвращает на место триггеры, потерянные при пересоздании posts_post.
+
+    Индекс после этого перестраивается, ведь правки без триггеров в него
+    не попали. Без таблицы индекса (миграция 0008 не применена) ничего не
+    делает. Возвращает True, если триггеры пришлось устанавливать.
+    """
+    if not search_supported(using):
+        return False
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, count(*) FROM sqlite_master "
+            "WHERE name = %s OR (type = 'trigger' AND name LIKE %s) "
+            "GROUP BY type",
+            [SEARCH_TABLE, f'{SEARCH_TABLE}_%']
+        )
+        found = dict(cursor.fetchall())
+    if 'table' not in found or found.get('trigger') == len(SEARCH_SCHEMA) - 1:
+        return False
+    install_search_index(using)
+    return True
+
+
+def drop_search_index(using=connection):
+    if not search_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in SEARCH_DROP:
+            cursor.execute(statement)
+
+
+def build_match_query(query):
+    """Превращает ввод пользователя в запрос FTS5 без его операторов.
+
+    Каждое слово ищется как префикс, все слова обязательны.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+class SearchResults:
+    """Посты, найденные по тексту, в порядке релевантности.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    """
+
+    def __init__(self, query):
+        self.match = build_match_query(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        if not search_supported():
+            return _filter_words(Post.objects.all(), self.match).count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s',
+                [self.match]
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.match:
+            return []
+        if not search_supported():
+            posts = Post.objects.select_related('author', 'group')
+            return list(_filter_words(posts, self.match)[index])
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{MATCH_SQL} ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, index.stop - start, start]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def _filter_words(queryset, match):
+    for word in re.findall(r'\w+', match):
+        queryset = queryset.filter(text__icontains=word)
+    return queryset
+
+
+def filter_by_text(queryset, query):
+    """Ограничивает queryset постами, подходящими под поисковый запрос."""
+    match = build_match_query(query)
+    if not match:
+        return queryset
+    if not search_supported():
+        return _filter_words(queryset, match)
+    return queryset.filter(pk__in=RawSQL(MATCH_SQL, [match]))
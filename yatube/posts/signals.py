@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import (get_page_scopes, invalidate_group_choices,
+                    invalidate_pages, invalidate_post_card)
+from .counters import change_author_count, change_group_count
+from .models import Group, Post
+from .thumbnails import schedule_thumbnails
+
+
+def _now_and_on_commit(invalidate, *args):
+    """Сбрасывает кэш сразу и ещё раз после фиксации транзакции.
+
+    Иначе другой воркер мог бы до фиксации прочитать старые данные и
+    снова положить их в кэш.
+    """
+    invalidate(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: invalidate(*args))
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    with transaction.atomic():
+        change_author_count(instance.author_id, -1)
+        change_group_count(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def drop_post_card(sender, instance, **kwargs):
+    _now_and_on_commit(invalidate_post_card, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def drop_cached_pages(sender, instance, **kwargs):
+    _now_and_on_commit(invalidate_pages, *get_page_scopes(instance))
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, **kwargs):
+    # Для прежней картинки миниатюры уже есть или их закажет страница.
+    if instance.image and (instance.image.name
+                           != getattr(instance, '_old_image', None)):
+        image_name = instance.image.name
+        transaction.on_commit(lambda: schedule_thumbnails(image_name))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def drop_group_choices(sender, instance, **kwargs):
+    invalidate_group_choices()
@@ -0,0 +1,82 @@
+import copy
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.db.models import Max, Min
+from django.utils import timezone
+
+register = template.Library()
+
+
+class IndexedDates:
+    """Обёртка queryset для date_hierarchy.
+
+    dates() не перебирает все строки. Годы берутся между первой и
+    последней датой: пустой год внутри диапазона редок, и его ссылка
+    просто ведёт к пустому списку. Месяцы и дни проверяются отдельным
+    EXISTS по индексу на каждый период, их не больше 31. MIN и MAX
+    запрашиваются по отдельности: только так SQLite берёт их с краёв
+    индекса.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def aggregate(self, **kwargs):
+        return {name: self.queryset.aggregate(**{name: expression})[name]
+                for name, expression in kwargs.items()}
+
+    def dates(self, field_name, kind):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first = timezone.localtime(bounds['first']).date()
+        last = timezone.localtime(bounds['last']).date()
+        if kind == 'year':
+            return [datetime.date(year, 1, 1)
+                    for year in range(first.year, last.year + 1)]
+        if kind == 'month':
+            months = range(first.year * 12 + first.month - 1,
+                           last.year * 12 + last.month)
+            periods = [(_month_start(month), _month_start(month + 1))
+                       for month in months]
+        else:
+            days = [first + datetime.timedelta(days=day)
+                    for day in range((last - first).days + 2)]
+            periods = list(zip(days, days[1:]))
+        return [start for start, end in periods
+                if self.has_rows(field_name, start, end)]
+
+    def has_rows(self, field_name, start, end):
+        return self.queryset.filter(**{
+            f'{field_name}__gte': _start_of_day(start),
+            f'{field_name}__lt': _start_of_day(end),
+        }).exists()
+
+
+def _month_start(month):
+    return datetime.date(month // 12, month % 12 + 1, 1)
+
+
+def _start_of_day(date):
+    return timezone.make_aware(
+        datetime.datetime.combine(date, datetime.time.min)
+    )
+
+
+def indexed_date_hierarchy(cl):
+    cl = copy.copy(cl)
+    cl.queryset = IndexedDates(cl.queryset)
+    return date_hierarchy(cl)
+
+
+@register.tag(name='indexed_date_hierarchy')
+def indexed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser, token,
+        func=indexed_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
@@ -0,0 +1,23 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..cache import (POST_CARD_TEMPLATE, POST_CARD_TIMEOUT, post_card_key,
+                     post_card_stats)
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    """Карточка поста из includes/post.html, закэшированная по id поста."""
+    key = post_card_key(post.pk)
+    html = cache.get(key)
+    if html is None:
+        post_card_stats.miss()
+        html = render_to_string(POST_CARD_TEMPLATE, {'post': post})
+        cache.set(key, html, POST_CARD_TIMEOUT)
+    else:
+        post_card_stats.hit()
+    return mark_safe(html)
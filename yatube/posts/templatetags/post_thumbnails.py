@@ -0,0 +1,13 @@
+from django import template
+
+from ..thumbnails import get_ready_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post):
+    """Миниатюра картинки поста или None, пока она создаётся в фоне."""
+    if hasattr(post, 'thumbnail'):
+        return post.thumbnail
+    return get_ready_thumbnail(post.image)
@@ -0,0 +1,106 @@
+import datetime
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..admin import EstimatedCountPaginator
+from ..models import Group, Post, get_user_model
+
+User = get_user_model()
+CHANGELIST_URL = reverse('admin:posts_post_changelist')
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, start, stop):
+        for i in range(start, stop):
+            author = User.objects.create_user(username=f'author_{i}')
+            group = Group.objects.create(title=f'Группа {i}',
+                                         slug=f'group_{i}',
+                                         description='Описание')
+            Post.objects.create(author=author, text=f'Пост {i}', group=group)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(CHANGELIST_URL)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_depend_on_rows(self):
+        self.create_posts(0, 2)
+        self.count_queries()
+        queries = self.count_queries()
+        self.create_posts(2, 12)
+        self.count_queries()
+        self.assertEqual(self.count_queries(), queries)
+
+    def test_group_choices_are_cached(self):
+        Post.objects.create(author=self.admin, text='Пост',
+                            group=self.group)
+        self.client.get(CHANGELIST_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(CHANGELIST_URL)
+        self.assertContains(response, self.group.title)
+        for query in context.captured_queries:
+            self.assertNotIn('FROM "posts_group"', query['sql'])
+        Group.objects.create(title='Новая группа', slug='new',
+                             description='Описание')
+        self.assertContains(self.client.get(CHANGELIST_URL), 'Новая группа')
+
+    def test_estimated_count_for_unfiltered_list(self):
+        Post.objects.create(author=self.admin, text='Пост')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('DELETE FROM sqlite_stat1')
+            cursor.execute(
+                "INSERT INTO sqlite_stat1 VALUES ('posts_post', NULL, '5000')"
+            )
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+        self.assertEqual(paginator.count, 5000)
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(author=self.admin), 100
+        )
+        self.assertEqual(paginator.count, 1)
+
+    def test_small_estimate_is_not_trusted(self):
+        Post.objects.create(author=self.admin, text='Пост')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+        self.assertEqual(paginator.count, 1)
+
+    def test_date_hierarchy(self):
+        post = Post.objects.create(author=self.admin, text='Пост')
+        year = timezone.localtime(post.pub_date).year
+        response = self.client.get(CHANGELIST_URL)
+        self.assertContains(response, f'pub_date__year={year}')
+        response = self.client.get(CHANGELIST_URL,
+                                   {'pub_date__year': year})
+        self.assertContains(response, 'pub_date__month=')
+
+    def test_date_hierarchy_skips_empty_months(self):
+        for month in (1, 3):
+            pub_date = timezone.make_aware(datetime.datetime(2020, month, 15))
+            post = Post.objects.create(author=self.admin, text='Пост')
+            Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+        response = self.client.get(CHANGELIST_URL, {'pub_date__year': 2020})
+        self.assertContains(response, 'pub_date__month=1&')
+        self.assertContains(response, 'pub_date__month=3&')
+        self.assertNotContains(response, 'pub_date__month=2&')
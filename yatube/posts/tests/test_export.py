@@ -0,0 +1,78 @@
+import csv
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, get_user_model
+
+User = get_user_model()
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.post = Post.objects.create(author=cls.user, text='Пост в группе',
+                                       group=cls.group)
+        Post.objects.create(author=cls.other, text='Пост без группы')
+        cls.staff = User.objects.create_user(username='staff',
+                                             is_staff=True)
+
+    def export(self, *args):
+        out = StringIO()
+        call_command('export_posts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_export_jsonl(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([record['text'] for record in records],
+                         ['Пост в группе', 'Пост без группы'])
+        self.assertEqual(records[0]['author'], 'auth')
+        self.assertEqual(records[0]['group'], 'group')
+        self.assertIsNone(records[1]['group'])
+
+    def test_export_filters(self):
+        self.assertEqual(len(self.export('--group', 'group').splitlines()), 1)
+        self.assertEqual(len(self.export('--author', 'other').splitlines()),
+                         1)
+        since = self.post.pub_date.isoformat()
+        self.assertEqual(len(self.export('--since', since).splitlines()), 2)
+        self.assertEqual(self.export('--until', since), '')
+        self.assertEqual(self.export('--until', '2000-01-01'), '')
+
+    def test_export_csv(self):
+        rows = list(csv.DictReader(StringIO(self.export('--format', 'csv'))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['author'], 'auth')
+
+    def test_export_can_be_imported(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl',
+                                         encoding='utf-8') as file:
+            call_command('export_posts', file.name, stderr=StringIO())
+            Post.objects.all().delete()
+            call_command('import_posts', file.name, stdout=StringIO())
+        post = Post.objects.get(text=self.post.text)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_export_view_is_streaming_and_staff_only(self):
+        url = reverse('posts:export')
+        response = Client().get(url)
+        self.assertEqual(response.status_code, 302)
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(url, {'group': 'group'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(json.loads(content)['text'], 'Пост в группе')
+        response = client.get(url, {'since': 'вчера'})
+        self.assertEqual(response.status_code, 400)
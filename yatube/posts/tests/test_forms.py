@@ -1,11 +1,20 @@
+import shutil
+import tempfile
 from http import HTTPStatus
+from io import BytesIO
+from unittest.mock import patch
 
-from django.test import Client, TestCase
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Post, Group, get_user_model
+from ..uploads import MAX_IMAGE_SIDE
 
 User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
 class PostFormTest(TestCase):
@@ -71,3 +80,59 @@ class PostFormTest(TestCase):
         for form_value, post_value in form_to_post.items():
             with self.subTest(form_value=form_value):
                 self.assertEqual(form_value, post_value)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageFormTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.CREATE_POST = reverse('posts:create_post')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def make_jpeg(self, size):
+        output = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        Image.new('RGB', size, 'red').save(output, 'JPEG', exif=exif)
+        return SimpleUploadedFile('photo.jpeg', output.getvalue(),
+                                  'image/jpeg')
+
+    def test_create_post_with_image(self):
+        self.authorized_client.post(
+            self.CREATE_POST,
+            {'text': 'Пост с картинкой', 'image': self.make_jpeg((4000, 100))}
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.image.name.startswith('posts/photo'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (MAX_IMAGE_SIDE, 48))
+            self.assertFalse(image.getexif())
+
+    def test_not_an_image_is_rejected(self):
+        response = self.authorized_client.post(
+            self.CREATE_POST,
+            {'text': 'Пост', 'image': SimpleUploadedFile(
+                'fake.jpg', b'not an image', 'image/jpeg')}
+        )
+        self.assertFalse(Post.objects.filter(text='Пост').exists())
+        self.assertTrue(response.context['form'].errors['image'])
+
+    @patch('posts.uploads.MAX_UPLOAD_SIZE', 100)
+    def test_oversized_upload_is_rejected(self):
+        response = self.authorized_client.post(
+            self.CREATE_POST,
+            {'text': 'Пост', 'image': self.make_jpeg((100, 100))}
+        )
+        self.assertFalse(Post.objects.filter(text='Пост').exists())
+        self.assertEqual(response.context['form'].errors['image'][0],
+                         'Файл больше 0 МБ.')
@@ -0,0 +1,104 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..cache import post_card_key
+from ..models import Group, Post, get_user_model
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+
+    def import_file(self, content, suffix, *args):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix,
+                                         encoding='utf-8') as file:
+            file.write(content)
+            file.flush()
+            out = StringIO()
+            call_command('import_posts', file.name, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_jsonl(self):
+        records = [
+            {'text': 'Пост 1', 'author': 'auth', 'group': 'group',
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'text': 'Пост 2', 'author': 'auth'},
+            {'text': 'Чужой пост', 'author': 'nobody'},
+            {'text': 'Пост в чужой группе', 'author': 'auth',
+             'group': 'nowhere'},
+        ]
+        content = '\n'.join(json.dumps(record) for record in records)
+        output = self.import_file(content + '\n{broken\n', '.jsonl')
+        self.assertIn('Импортировано постов: 2, пропущено: 3', output)
+        post = Post.objects.get(text='Пост 1')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date,
+                         parse_datetime('2020-01-02T03:04:05+00:00'))
+        self.assertTrue(Post.objects.filter(text='Пост 2',
+                                            group=None).exists())
+        self.user.stats.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 2)
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_import_csv(self):
+        content = 'text,author,group\nПост,auth,group\nЕщё пост,auth,\n'
+        self.import_file(content, '.csv')
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 2)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 1)
+
+    def test_import_is_batched(self):
+        content = '\n'.join(
+            json.dumps({'text': f'Пост {i}', 'author': 'auth'})
+            for i in range(5)
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.import_file(content, '.jsonl', '--chunk-size', '2')
+        inserts = [query for query in context.captured_queries
+                   if query['sql'].startswith('INSERT INTO "posts_post"')]
+        user_lookups = [query for query in context.captured_queries
+                        if 'FROM "auth_user"' in query['sql']]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(len(user_lookups), 1)
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_pub_dates_are_kept_across_chunks(self):
+        Post.objects.create(author=self.user, text='Старый пост')
+        content = '\n'.join(
+            json.dumps({'text': f'Пост {day}', 'author': 'auth',
+                        'pub_date': f'2020-01-{day:02}T00:00:00+00:00'})
+            for day in range(1, 6)
+        )
+        self.import_file(content, '.jsonl', '--chunk-size', '2')
+        for day in range(1, 6):
+            with self.subTest(day=day):
+                self.assertEqual(
+                    Post.objects.get(text=f'Пост {day}').pub_date.day, day
+                )
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+        self.assertEqual(Post.objects.get(text='Старый пост').pub_date.year,
+                         timezone.now().year)
+
+    def test_import_drops_stale_cards(self):
+        last = Post.objects.create(author=self.user, text='Старый пост')
+        key = post_card_key(last.pk + 1)
+        cache.set(key, 'Карточка из другой базы')
+        self.import_file(json.dumps({'text': 'Новый пост', 'author': 'auth'}),
+                         '.jsonl')
+        self.assertEqual(Post.objects.get(text='Новый пост').pk, last.pk + 1)
+        self.assertIsNone(cache.get(key))
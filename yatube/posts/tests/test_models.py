@@ -1,3 +1,8 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import DatabaseError
 from django.test import TestCase
 
 from ..models import Group, Post, get_user_model
@@ -23,3 +28,63 @@ class PostModelTest(TestCase):
     def test_models_have_correct_object_names(self):
         self.assertEqual(self.group.title, str(self.group))
         self.assertEqual(self.post.text, str(self.post))
+
+
+class PostsCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group_1 = Group.objects.create(title='Группа 1', slug='group_1',
+                                           description='Описание')
+        cls.group_2 = Group.objects.create(title='Группа 2', slug='group_2',
+                                           description='Описание')
+
+    def assertCounts(self, author, group_1, group_2):
+        self.user.stats.refresh_from_db()
+        self.group_1.refresh_from_db()
+        self.group_2.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, author)
+        self.assertEqual(self.group_1.posts_count, group_1)
+        self.assertEqual(self.group_2.posts_count, group_2)
+
+    def test_counters_follow_post_changes(self):
+        post = Post.objects.create(author=self.user, text='Пост',
+                                   group=self.group_1)
+        Post.objects.create(author=self.user, text='Пост без группы')
+        self.assertCounts(2, 1, 0)
+        post.group = self.group_2
+        post.save()
+        self.assertCounts(2, 0, 1)
+        post.delete()
+        self.assertCounts(1, 0, 0)
+
+    def test_counters_follow_author_change(self):
+        other = User.objects.create_user(username='other')
+        post = Post.objects.create(author=self.user, text='Пост',
+                                   group=self.group_1)
+        post.author = other
+        post.save()
+        self.assertCounts(0, 1, 0)
+        other.stats.refresh_from_db()
+        self.assertEqual(other.stats.posts_count, 1)
+
+    def test_failed_counter_update_rolls_back_save(self):
+        post = Post.objects.create(author=self.user, text='Пост',
+                                   group=self.group_1)
+        post.group = self.group_2
+        with patch('posts.counters.change_group_count',
+                   side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.group, self.group_1)
+        self.assertCounts(1, 1, 0)
+
+    def test_recount_posts_command(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='Пост', group=self.group_2)
+             for _ in range(3)]
+        )
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounts(3, 0, 3)
@@ -0,0 +1,186 @@
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from about import urls as about_urls
+from users import urls as users_urls
+
+from .. import urls as posts_urls
+from ..counters import recount_posts
+from ..models import Group, Post, get_user_model
+from ..thumbnails import generate_thumbnails
+from .test_views import SMALL_GIF
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+POSTS_COUNT = 90
+PAGE_SIZES = (5, 20)
+# Сколько запросов может сделать страница авторизованного пользователя
+# при пустом кэше. Сессия и пользователь — 2 запроса из каждого бюджета.
+BUDGETS = {
+    'posts:index': 6,
+    'posts:index_rss': 4,
+    'posts:index_atom': 4,
+    'posts:group_list': 6,
+    'posts:group_rss': 5,
+    'posts:group_atom': 5,
+    'posts:profile': 6,
+    'posts:profile_rss': 5,
+    'posts:profile_atom': 5,
+    'posts:post_detail': 5,
+    'posts:search': 6,
+    'posts:export': 3,
+    'posts:create_post': 2,
+    'posts:post_edit': 4,
+    'posts:api_index': 4,
+    'posts:api_post_detail': 4,
+    'posts:api_group_list': 5,
+    'posts:api_profile': 5,
+    'users:logout': 4,
+    'users:signup': 2,
+    'users:login': 2,
+    'users:password_change_form': 2,
+    'users:password_change_done': 2,
+    'users:password_reset_form': 0,
+    'users:password_reset_done': 0,
+    'users:password_reset_confirm': 5,
+    'users:password_reset_complete': 0,
+    'about:author': 2,
+    'about:tech': 2,
+}
+# Ленты, у которых число записей на странице задаётся настройкой.
+PAGED_URLS = {
+    'posts:index': ('', '?page=2'),
+    'posts:group_list': ('', '?page=2'),
+    'posts:profile': ('', '?page=2'),
+    'posts:search': ('?q=Пост', '?q=Пост&page=2'),
+    'posts:index_rss': ('',),
+    'posts:group_rss': ('',),
+    'posts:profile_rss': ('',),
+    'posts:api_index': ('',),
+    'posts:api_group_list': ('',),
+    'posts:api_profile': ('',),
+}
+
+
+def url_names():
+    return {
+        f'{module.app_name}:{pattern.name}'
+        for module in (posts_urls, users_urls, about_urls)
+        for pattern in module.urlpatterns
+    }
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class QueryBudgetTests(TestCase):
+    """Число запросов каждой страницы не больше бюджета и не зависит от
+    числа постов на странице.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth', is_staff=True)
+        authors = [cls.user] + [
+            User.objects.create_user(username=f'author_{i}')
+            for i in range(2)
+        ]
+        groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group_{i}',
+                                 description='Описание')
+            for i in range(2)
+        ]
+        cls.group = groups[0]
+        posts = []
+        for i in range(POSTS_COUNT):
+            image = SimpleUploadedFile(f'small_{i}.gif', SMALL_GIF,
+                                       'image/gif')
+            posts.append(Post(author=authors[i % 3], text=f'Пост {i}',
+                              group=groups[i % 2], image=image))
+            posts[-1].image.save(image.name, image, save=False)
+        Post.objects.bulk_create(posts)
+        recount_posts()
+        for post in posts:
+            generate_thumbnails(post.image.name)
+        cls.post = Post.objects.filter(author=cls.user).first()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get_url(self, name):
+        args = {
+            'group': (self.group.slug,),
+            'profile': (self.user.username,),
+            'post_': (self.post.pk,),
+        }
+        if name == 'users:password_reset_confirm':
+            return reverse(name, args=(
+                urlsafe_base64_encode(force_bytes(self.user.pk)),
+                default_token_generator.make_token(self.user),
+            ))
+        view_name = name.split(':')[1]
+        if view_name.startswith('api_'):
+            view_name = view_name[len('api_'):]
+        for prefix, value in args.items():
+            if view_name.startswith(prefix):
+                return reverse(name, args=value)
+        return reverse(name)
+
+    def count_queries(self, url):
+        cache.clear()
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url)
+        return context.captured_queries
+
+    def assertWithinBudget(self, url, budget):
+        queries = self.count_queries(url)
+        if len(queries) > budget:
+            sql = '\n'.join(f'{number}. {query["sql"]}'
+                            for number, query in enumerate(queries, 1))
+            self.fail(f'{url}: {len(queries)} запросов при бюджете '
+                      f'{budget}:\n{sql}')
+        return len(queries)
+
+    def test_every_url_has_budget(self):
+        self.assertEqual(url_names(), set(BUDGETS))
+
+    def test_views_stay_within_budget(self):
+        for name, budget in BUDGETS.items():
+            for query in PAGED_URLS.get(name, ('',)):
+                url = self.get_url(name) + query
+                with self.subTest(url=url):
+                    self.assertWithinBudget(url, budget)
+
+    def test_budgets_do_not_depend_on_page_size(self):
+        for name, queries in PAGED_URLS.items():
+            for query in queries:
+                url = self.get_url(name) + query
+                counts = []
+                for page_size in PAGE_SIZES:
+                    with patch('posts.utils.LATEST_POSTS_COUNT', page_size), \
+                            patch('posts.api.LATEST_POSTS_COUNT', page_size), \
+                            patch('posts.feeds.FEED_ITEMS_COUNT', page_size):
+                        counts.append(len(self.count_queries(url)))
+                with self.subTest(url=url):
+                    self.assertEqual(counts[0], counts[1])
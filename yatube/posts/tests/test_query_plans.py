@@ -0,0 +1,95 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, get_user_model
+from ..utils import LATEST_POSTS_COUNT
+
+User = get_user_model()
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)( AS \w+)?$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+@contextmanager
+def capture_sql():
+    queries = []
+
+    def wrapper(execute, sql, params, many, context):
+        queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield queries
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц постов не должны читать таблицы целиком."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='test',
+            slug='group_1',
+            description='Тестовое описание',
+        )
+        for i in range(LATEST_POSTS_COUNT * 2 + 1):
+            cls.post = Post.objects.create(author=cls.user,
+                                           text=f'Пост {i}',
+                                           group=cls.group)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get_urls(self):
+        group_list = reverse('posts:group_list', args=(self.group.slug,))
+        profile = reverse('posts:profile', args=(self.user.username,))
+        urls = {}
+        for url in (reverse('posts:index'), group_list, profile):
+            first_page = self.client.get(url).context['page_obj']
+            urls[url] = ()
+            urls[f'{url}?after={first_page.next_cursor}'] = ()
+            urls[f'{url}?page=2'] = ()
+        for name, args in (('index', ()), ('group', (self.group.slug,)),
+                           ('profile', (self.user.username,))):
+            urls[reverse(f'posts:{name}_rss', args=args)] = ()
+        for name, args in (('index', ()), ('group_list', (self.group.slug,)),
+                           ('profile', (self.user.username,))):
+            api_url = reverse(f'posts:api_{name}', args=args)
+            urls[api_url] = ()
+            urls[self.client.get(api_url).json()['next']] = ()
+        urls[reverse('posts:search') + '?q=Пост'] = ()
+        urls[reverse('posts:search') + '?q=Пост&page=2'] = ()
+        post_id = (self.post.pk,)
+        urls[reverse('posts:post_detail', args=post_id)] = ()
+        urls[reverse('posts:api_post_detail', args=post_id)] = ()
+        # Форма выводит все группы списком, это полное чтение по замыслу.
+        urls[reverse('posts:create_post')] = ('posts_group',)
+        urls[reverse('posts:post_edit', args=post_id)] = ('posts_group',)
+        return urls
+
+    def test_views_use_indexes(self):
+        for url, allowed_scans in self.get_urls().items():
+            with self.subTest(url=url):
+                with capture_sql() as queries:
+                    self.client.get(url)
+                for sql, params in queries:
+                    for step in explain(sql, params):
+                        full_scan = FULL_SCAN.match(step)
+                        self.assertFalse(
+                            full_scan
+                            and full_scan.group('table') not in allowed_scans,
+                            f'{step}: {sql}'
+                        )
+                        self.assertNotIn(TEMP_SORT, step, sql)
@@ -1,16 +1,41 @@
+import shutil
 import tempfile
+import time
+from http import HTTPStatus
+from unittest.mock import patch
 
 from django import forms
 from django.conf import settings
-from django.test import Client, TestCase, override_settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.sql import emit_post_migrate_signal
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.tests.utils import (other_worker_cache, read_in_other_worker,
+                              shared_cache)
+
+from ..cache import page_stats, post_card_key, post_card_stats
 from ..models import Post, Group, get_user_model
-from ..utils import LATEST_POSTS_COUNT
+from ..search import ensure_search_index
+from ..thumbnails import generate_thumbnails
+from ..utils import LATEST_POSTS_COUNT, get_page_links
 
 User = get_user_model()
 COUNT_POSTS = 13
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -156,3 +181,558 @@ class PaginatorView(TestCase):
             response = self.authorized_client.get(page)
             self.assertEqual(len(response.conext['page_obj']),
                              LATEST_POSTS_COUNT)
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Test',
+            slug='group',
+            description='Test group'
+        )
+        for i in range(COUNT_POSTS):
+            Post.objects.create(text=f'Test post {i}', group=cls.group,
+                                author=cls.user)
+        cls.posts = list(Post.objects.order_by('-pub_date', '-pk'))
+        cls.pages = [reverse('posts:index'),
+                     reverse('posts:group_list', args=(cls.group.slug,)),
+                     reverse('posts:profile', args=(cls.user.username,))]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_page_uses_cursor(self):
+        for page in self.pages:
+            with self.subTest(page=page):
+                page_obj = self.client.get(page).context['page_obj']
+                self.assertTrue(page_obj.is_cursor)
+                self.assertEqual(list(page_obj),
+                                 self.posts[:LATEST_POSTS_COUNT])
+                self.assertTrue(page_obj.has_next())
+                self.assertFalse(page_obj.has_previous())
+
+    def test_after_and_before_cursors(self):
+        for page in self.pages:
+            with self.subTest(page=page):
+                first = self.client.get(page).context['page_obj']
+                second = self.client.get(
+                    page, {'after': first.next_cursor}).context['page_obj']
+                self.assertEqual(list(second),
+                                 self.posts[LATEST_POSTS_COUNT:])
+                self.assertFalse(second.has_next())
+                back = self.client.get(
+                    page, {'before': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_returns_first_page(self):
+        page_obj = self.client.get(
+            self.pages[0], {'after': 'broken'}).context['page_obj']
+        self.assertEqual(list(page_obj), self.posts[:LATEST_POSTS_COUNT])
+
+    def test_page_number_falls_back_to_paginator(self):
+        page_obj = self.client.get(
+            self.pages[0], {'page': 2}).context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual(len(page_obj), COUNT_POSTS - LATEST_POSTS_COUNT)
+
+
+class PageLinksTests(TestCase):
+    def test_page_links_window(self):
+        paginator = Paginator(range(1000), LATEST_POSTS_COUNT)
+        cases = {
+            1: [1, 2, 3, None, 100],
+            4: [1, 2, 3, 4, 5, 6, None, 100],
+            50: [1, None, 48, 49, 50, 51, 52, None, 100],
+            100: [1, None, 98, 99, 100],
+        }
+        for number, links in cases.items():
+            with self.subTest(number=number):
+                page_obj = paginator.page(number)
+                self.assertEqual(get_page_links(page_obj), links)
+
+    def test_few_pages_are_listed_in_full(self):
+        page_obj = Paginator(range(30), LATEST_POSTS_COUNT).page(2)
+        self.assertEqual(get_page_links(page_obj), [1, 2, 3])
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Старый текст')
+        cls.INDEX = reverse('posts:index')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_card_is_cached(self):
+        self.authorized_client.get(self.INDEX)
+        hits = post_card_stats.hits
+        response = self.authorized_client.get(self.INDEX)
+        self.assertEqual(post_card_stats.hits, hits + 1)
+        self.assertContains(response, 'Старый текст')
+
+    def test_post_edit_invalidates_card(self):
+        self.client.get(self.INDEX)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'Новый текст'}
+        )
+        response = self.client.get(self.INDEX)
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Старый текст')
+
+    @shared_cache
+    def test_post_edit_invalidates_card_for_other_workers(self):
+        cache.clear()
+        self.client.get(self.INDEX)
+        other_cache = other_worker_cache()
+        key = post_card_key(self.post.pk)
+        self.assertIsNotNone(other_cache.get(key))
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'Новый текст'}
+        )
+        self.assertIsNone(other_cache.get(key))
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='test', slug='group_1',
+                                         description='Тестовое описание')
+        cls.group2 = Group.objects.create(title='test2', slug='group_2',
+                                          description='Тестовое описание')
+        cls.post = Post.objects.create(author=cls.user, text='Старый текст',
+                                       group=cls.group)
+        cls.INDEX = reverse('posts:index')
+        cls.GROUP_LIST = reverse('posts:group_list', args=(cls.group.slug,))
+        cls.GROUP_LIST_2 = reverse('posts:group_list',
+                                   args=(cls.group2.slug,))
+        cls.PROFILE = reverse('posts:profile', args=(cls.user.username,))
+        cls.OTHER_PROFILE = reverse('posts:profile',
+                                    args=(cls.other.username,))
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_pages_are_cached(self):
+        for page in (self.INDEX, self.GROUP_LIST, self.PROFILE):
+            with self.subTest(page=page):
+                first = self.client.get(page)
+                hits = page_stats.hits
+                second = self.client.get(page)
+                self.assertEqual(page_stats.hits, hits + 1)
+                self.assertEqual(first.content, second.content)
+
+    def test_authorized_pages_are_not_cached(self):
+        self.authorized_client.get(self.INDEX)
+        hits = page_stats.hits
+        response = self.authorized_client.get(self.INDEX)
+        self.assertEqual(page_stats.hits, hits)
+        self.assertContains(response, self.user.username)
+
+    def test_post_edit_invalidates_affected_pages(self):
+        affected = (self.INDEX, self.GROUP_LIST, self.GROUP_LIST_2,
+                    self.PROFILE)
+        for page in affected + (self.OTHER_PROFILE,):
+            self.client.get(page)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'Новый текст', 'group': self.group2.pk}
+        )
+        hits = page_stats.hits
+        self.client.get(self.OTHER_PROFILE)
+        self.assertEqual(page_stats.hits, hits + 1)
+        for page in affected:
+            with self.subTest(page=page):
+                misses = page_stats.misses
+                response = self.client.get(page)
+                self.assertEqual(page_stats.misses, misses + 1)
+                if page == self.GROUP_LIST:
+                    self.assertNotContains(response, 'Новый текст')
+                else:
+                    self.assertContains(response, 'Новый текст')
+
+    @shared_cache
+    def test_invalidation_reaches_other_workers(self):
+        cache.clear()
+        self.client.get(self.INDEX)
+        key = 'page_version:index'
+        version = cache.get(key)
+        self.assertEqual(read_in_other_worker(key), repr(version))
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'Новый текст'}
+        )
+        self.assertNotEqual(other_worker_cache().get(key), version)
+        self.assertEqual(read_in_other_worker(key), repr(cache.get(key)))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='test', slug='group_1',
+                                         description='Тестовое описание')
+        cls.post = Post.objects.create(author=cls.user, text='Текст',
+                                       group=cls.group)
+        cls.pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.user.username,)),
+            reverse('posts:post_detail', args=(cls.post.pk,)),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_pages_return_not_modified(self):
+        for page in self.pages:
+            with self.subTest(page=page):
+                response = self.client.get(page)
+                etag = response['ETag']
+                with self.assertNumQueries(1):
+                    response = self.client.get(page,
+                                               HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        for page in self.pages:
+            with self.subTest(page=page):
+                last_modified = self.client.get(page)['Last-Modified']
+                response = self.client.get(
+                    page, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    def test_delete_changes_validators(self):
+        other = Post.objects.create(author=self.user, text='Другой пост',
+                                    group=self.group)
+        responses = [self.client.get(page) for page in self.pages]
+        # Удаление позже на пару секунд: в Last-Modified нет долей секунды.
+        with patch('posts.cache.time.time_ns',
+                   return_value=time.time_ns() + 2 * 10 ** 9):
+            other.delete()
+        for page, response in zip(self.pages, responses):
+            with self.subTest(page=page):
+                for header, value in (
+                        ('HTTP_IF_NONE_MATCH', response['ETag']),
+                        ('HTTP_IF_MODIFIED_SINCE',
+                         response['Last-Modified'])):
+                    self.assertEqual(
+                        self.client.get(page, **{header: value}).status_code,
+                        HTTPStatus.OK
+                    )
+
+    def test_post_edit_changes_etag(self):
+        etags = [self.client.get(page)['ETag'] for page in self.pages]
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for page, etag in zip(self.pages, etags):
+            with self.subTest(page=page):
+                response = self.client.get(page, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='test', slug='group_1',
+                                         description='Тестовое описание')
+        cls.post = Post.objects.create(author=cls.user, text='Текст в ленте',
+                                       group=cls.group)
+        cls.feeds = {}
+        for name, args in (('index', ()), ('group', (cls.group.slug,)),
+                           ('profile', (cls.user.username,))):
+            cls.feeds[reverse(f'posts:{name}_rss', args=args)] = 'rss'
+            cls.feeds[reverse(f'posts:{name}_atom', args=args)] = 'atom'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_contain_posts(self):
+        for feed, feed_type in self.feeds.items():
+            with self.subTest(feed=feed):
+                response = self.client.get(feed)
+                self.assertIn(feed_type, response['Content-Type'])
+                self.assertContains(response, 'Текст в ленте')
+                self.assertContains(
+                    response,
+                    reverse('posts:post_detail', args=(self.post.pk,))
+                )
+
+    def test_unknown_feed_object(self):
+        for name in ('posts:group_rss', 'posts:profile_atom'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=('unknown',)))
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feeds_are_cached_and_invalidated(self):
+        for feed in self.feeds:
+            self.client.get(feed)
+        for feed, feed_type in self.feeds.items():
+            with self.subTest(feed=feed):
+                hits = page_stats.hits
+                response = self.client.get(feed)
+                self.assertEqual(page_stats.hits, hits + 1)
+                self.assertIn(feed_type, response['Content-Type'])
+        self.post.text = 'Новый текст в ленте'
+        self.post.save()
+        for feed in self.feeds:
+            with self.subTest(feed=feed):
+                self.assertContains(self.client.get(feed),
+                                    'Новый текст в ленте')
+
+    def test_unchanged_feed_costs_one_query(self):
+        for feed in self.feeds:
+            with self.subTest(feed=feed):
+                etag = self.client.get(feed)['ETag']
+                with self.assertNumQueries(1):
+                    response = self.client.get(feed,
+                                               HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    def test_pages_link_to_feeds(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:index_atom'))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        )
+        cls.POST_DETAIL = reverse('posts:post_detail', args=(cls.post.pk,))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        with patch('posts.thumbnails.schedule_thumbnails') as schedule:
+            response = self.client.get(self.POST_DETAIL)
+        schedule.assert_called_once_with(self.post.image.name)
+        self.assertContains(response, 'aspect-ratio')
+        self.assertNotContains(response, '<img class="card-img')
+        generate_thumbnails(self.post.image.name)
+        response = self.client.get(self.POST_DETAIL)
+        self.assertContains(response, '<img class="card-img')
+
+    def test_existing_thumbnails_change_nothing(self):
+        generate_thumbnails(self.post.image.name)
+        updated = Post.objects.get(pk=self.post.pk).updated
+        generate_thumbnails(self.post.image.name)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated, updated)
+
+    def test_thumbnails_are_scheduled_for_new_image_only(self):
+        post = Post.objects.get(pk=self.post.pk)
+        # В TestCase транзакция не фиксируется, колбэки зовутся сразу.
+        with patch('posts.signals.transaction.on_commit',
+                   side_effect=lambda func: func()), \
+                patch('posts.signals.schedule_thumbnails') as schedule:
+            post.text = 'Новый текст'
+            post.save()
+            schedule.assert_not_called()
+            post.image = SimpleUploadedFile('other.gif', SMALL_GIF,
+                                            'image/gif')
+            post.save()
+        schedule.assert_called_once_with(post.image.name)
+
+    def test_thumbnails_are_fetched_in_one_query(self):
+        for i in range(3):
+            post = Post.objects.create(
+                author=self.user,
+                text=f'Ещё пост {i}',
+                image=SimpleUploadedFile(f'small_{i}.gif', SMALL_GIF,
+                                         'image/gif')
+            )
+            generate_thumbnails(post.image.name)
+        generate_thumbnails(self.post.image.name)
+        cache.clear()
+        client = Client()
+        client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('posts:index'))
+        kvstore_queries = [query['sql'] for query in queries
+                           if 'thumbnail_kvstore' in query['sql']]
+        self.assertEqual(len(kvstore_queries), 1)
+        self.assertContains(response, '<img class="card-img', count=4)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user,
+                                       text='Лев Толстой и Москва')
+        Post.objects.create(author=cls.user, text='Толстой, Толстой, Толстой')
+        Post.objects.create(author=cls.user, text='Про что-то другое')
+        cls.SEARCH = reverse('posts:search')
+
+    def search(self, query, **params):
+        response = self.client.get(self.SEARCH, {'q': query, **params})
+        return list(response.context['page_obj'])
+
+    def test_search_is_ranked(self):
+        found = self.search('толст')
+        self.assertEqual([post.text for post in found],
+                         ['Толстой, Толстой, Толстой',
+                          'Лев Толстой и Москва'])
+        self.assertEqual(self.search('лев москва'), [self.post])
+        self.assertEqual(self.search('"OR* -'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Фёдор Достоевский'
+        post.save()
+        self.assertEqual(self.search('достоевский'), [post])
+        self.assertEqual(self.search('москва'), [])
+        post.delete()
+        self.assertEqual(self.search('достоевский'), [])
+
+    def test_search_is_paginated(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, text=f'Статья номер {i}')
+             for i in range(COUNT_POSTS)]
+        )
+        self.assertEqual(len(self.search('статья')), LATEST_POSTS_COUNT)
+        self.assertEqual(len(self.search('статья', page=2)),
+                         COUNT_POSTS - LATEST_POSTS_COUNT)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'москва'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.post])
+
+
+class SearchIndexMigrationTests(TransactionTestCase):
+    """Пересоздание posts_post в SQLite удаляет триггеры индекса."""
+
+    def search(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_index_survives_table_rebuild(self):
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Лев Толстой')
+        field = Post._meta.get_field('text')
+        with connection.schema_editor() as editor:
+            editor.alter_field(Post, field, field)
+        emit_post_migrate_signal(0, False, 'default')
+        post.text = 'Фёдор Достоевский'
+        post.save()
+        self.assertEqual(self.search('достоевский'), [post])
+        self.assertEqual(self.search('толстой'), [])
+        self.assertFalse(ensure_search_index())
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='test', slug='group_1',
+                                         description='Тестовое описание')
+        Post.objects.bulk_create(
+            [Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+             for i in range(COUNT_POSTS)]
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Последний')
+        cls.feeds = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=(cls.group.slug,)),
+            reverse('posts:api_profile', args=(cls.user.username,)),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages_cover_all_posts(self):
+        for feed, total in zip(self.feeds,
+                               (COUNT_POSTS + 1, COUNT_POSTS,
+                                COUNT_POSTS + 1)):
+            with self.subTest(feed=feed):
+                ids = []
+                url = feed
+                while url:
+                    data = self.client.get(url).json()
+                    ids.extend(record['id'] for record in data['results'])
+                    url = data['next']
+                self.assertEqual(len(ids), total)
+                self.assertEqual(len(set(ids)), total)
+                first = self.client.get(feed).json()
+                second = self.client.get(first['next']).json()
+                self.assertEqual(
+                    self.client.get(second['previous']).json()['results'],
+                    first['results']
+                )
+
+    def test_fields_limit_selected_columns(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('posts:api_index'),
+                                       {'fields': 'id,author', 'limit': 3})
+        data = response.json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(data['results'][0],
+                         {'id': self.post.pk, 'author': 'auth'})
+        self.assertIn('fields=id%2Cauthor', data['next'])
+        for query in context.captured_queries:
+            self.assertNotIn('"text"', query['sql'])
+
+    def test_post_detail(self):
+        url = reverse('posts:api_post_detail', args=(self.post.pk,))
+        data = self.client.get(url).json()
+        self.assertEqual(data['text'], 'Последний')
+        self.assertIsNone(data['group'])
+        self.assertIsNone(data['image'])
+        response = self.client.get(
+            reverse('posts:api_post_detail', args=(0,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_errors(self):
+        response = self.client.get(reverse('posts:api_index'),
+                                   {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('password', response.json()['detail'])
+        response = self.client.get(
+            reverse('posts:api_group_list', args=('unknown',)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cached_response_keeps_content_type(self):
+        for _ in range(2):
+            response = self.client.get(reverse('posts:api_index'),
+                                       {'fields': 'id'})
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(list(response.json()['results'][0]), ['id'])
@@ -0,0 +1,181 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .cache import get_page_scopes, invalidate_pages, invalidate_post_card
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+POST_IMAGE_GEOMETRY = '960x339'
+POST_IMAGE_OPTIONS = {'crop': 'center', 'upscale': True}
+# Все размеры миниатюр, которые выводят шаблоны.
+THUMBNAIL_GEOMETRIES = (
+    (POST_IMAGE_GEOMETRY, POST_IMAGE_OPTIONS),
+)
+
+_executor = None
+_executor_lock = Lock()
+_pending = set()
+
+
+def get_thumbnail_file(file_, geometry, options):
+    """ImageFile миниатюры с тем именем, которое ей даст sorl.
+
+    Повторяет подготовку опций из ThumbnailBackend.get_thumbnail, но не
+    обращается ни к хранилищу, ни к исходной картинке.
+    """
+    backend = default.backend
+    source = ImageFile(file_)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def get_ready_thumbnail(file_, geometry=POST_IMAGE_GEOMETRY,
+                        options=POST_IMAGE_OPTIONS):
+    """Готовая миниатюра из хранилища ключей sorl или None.
+
+    Картинку не декодирует: если миниатюры ещё нет, она ставится в
+    очередь фоновой генерации.
+    """
+    if not file_:
+        return None
+    thumbnail = default.kvstore.get(
+        get_thumbnail_file(file_, geometry, options)
+    )
+    if thumbnail is None:
+        schedule_thumbnails(file_.name)
+    return thumbnail
+
+
+def _get_many_thumbnails(thumbnails):
+    kvstore = default.kvstore
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        return {key: kvstore.get(thumbnail)
+                for key, thumbnail in thumbnails.items()}
+    keys = {add_prefix(thumbnail.key): key
+            for key, thumbnail in thumbnails.items()}
+    values = kvstore.cache.get_many(list(keys))
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(KVStoreModel.objects.filter(key__in=missing)
+                      .values_list('key', 'value'))
+        kvstore.cache.set_many(stored,
+                               sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(stored)
+    return {
+        key: (deserialize_image_file(values[raw_key])
+              if isinstance(values.get(raw_key), str) else None)
+        for raw_key, key in keys.items()
+    }
+
+
+def prefetch_thumbnails(posts):
+    """Находит миниатюры для всех постов страницы за один запрос.
+
+    Результат сохраняется в post.thumbnail и читается тегом
+    post_thumbnail вместо отдельного обращения на каждый пост.
+    """
+    thumbnails = {}
+    for post in posts:
+        post.thumbnail = None
+        if post.image:
+            thumbnails[post.image.name] = get_thumbnail_file(
+                post.image, POST_IMAGE_GEOMETRY, POST_IMAGE_OPTIONS
+            )
+    if not thumbnails:
+        return
+    ready = _get_many_thumbnails(thumbnails)
+    for post in posts:
+        if post.image:
+            post.thumbnail = ready[post.image.name]
+            if post.thumbnail is None:
+                schedule_thumbnails(post.image.name)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+        return _executor
+
+
+def schedule_thumbnails(image_name):
+    """Ставит создание миниатюр в очередь пула потоков.
+
+    При POST_THUMBNAIL_WORKERS = 0 миниатюры создаются сразу.
+    """
+    if not settings.POST_THUMBNAIL_WORKERS:
+        _generate_logged(image_name)
+        return
+    with _executor_lock:
+        if image_name in _pending:
+            return
+        _pending.add(image_name)
+    _get_executor().submit(_run_in_worker, image_name)
+
+
+def _generate_logged(image_name):
+    try:
+        generate_thumbnails(image_name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', image_name)
+
+
+def _run_in_worker(image_name):
+    try:
+        _generate_logged(image_name)
+    finally:
+        with _executor_lock:
+            _pending.discard(image_name)
+        connection.close()
+
+
+def generate_thumbnails(image_name):
+    """Создаёт недостающие миниатюры картинки и сбрасывает кэш её постов.
+
+    Если все миниатюры уже были, ничего не меняется. Иначе поле updated
+    меняется, чтобы ETag страниц перестал совпадать с версией, где была
+    заглушка.
+    """
+    missing = [
+        (geometry, options)
+        for geometry, options in THUMBNAIL_GEOMETRIES
+        if default.kvstore.get(
+            get_thumbnail_file(image_name, geometry, options)) is None
+    ]
+    if not missing:
+        return
+    for geometry, options in missing:
+        get_thumbnail(image_name, geometry, **options)
+    posts = Post.objects.filter(image=image_name).select_related(
+        'author', 'group'
+    )
+    for post in posts:
+        invalidate_post_card(post.pk)
+        invalidate_pages(*get_page_scopes(post))
+    posts.update(updated=timezone.now())
@@ -0,0 +1,111 @@
+import io
+import os
+
+from django import forms
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image, ImageOps
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+MAX_IMAGE_SIDE = 1920
+IMAGE_FORMATS = {
+    'JPEG': ('image/jpeg', '.jpg'),
+    'PNG': ('image/png', '.png'),
+    'GIF': ('image/gif', '.gif'),
+    'WEBP': ('image/webp', '.webp'),
+}
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Отметка о файле, загрузка которого была прервана по размеру."""
+
+    def __init__(self, name, content_type, size):
+        super().__init__(io.BytesIO(), name, content_type, size)
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Перестаёт принимать файл, как только он превысил MAX_UPLOAD_SIZE.
+
+    Стоит первым в FILE_UPLOAD_HANDLERS: следующие обработчики получают не
+    больше MAX_UPLOAD_SIZE байт, а форма — OversizedUploadedFile.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > MAX_UPLOAD_SIZE:
+            self.oversized = True
+        return None if self.oversized else raw_data
+
+    def file_complete(self, file_size):
+        if self.oversized:
+            return OversizedUploadedFile(self.file_name, self.content_type,
+                                         self.received)
+        return None
+
+
+def _open_image(data):
+    """Читает только заголовок картинки и проверяет формат и размеры."""
+    try:
+        image = Image.open(data)
+    except (OSError, Image.DecompressionBombError):
+        raise forms.ValidationError(
+            'Загрузите картинку в формате JPEG, PNG, GIF или WebP.',
+            code='invalid_image'
+        )
+    if image.format not in IMAGE_FORMATS:
+        raise forms.ValidationError(
+            'Загрузите картинку в формате JPEG, PNG, GIF или WebP.',
+            code='invalid_image'
+        )
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise forms.ValidationError(
+            'Слишком большое разрешение картинки.', code='too_many_pixels'
+        )
+    return image
+
+
+def _reencode(image):
+    """Уменьшает картинку до MAX_IMAGE_SIDE и сохраняет без метаданных."""
+    image_format = image.format
+    if image_format == 'JPEG':
+        # Декодирует JPEG сразу в уменьшенном масштабе.
+        image.draft('RGB', (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    output = io.BytesIO()
+    options = {'optimize': True}
+    if image_format == 'JPEG':
+        options['quality'] = 85
+    image.save(output, format=image_format, **options)
+    return output.getvalue()
+
+
+class PostImageField(forms.ImageField):
+    """Поле картинки поста с ограничением размера и очисткой метаданных."""
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        if isinstance(data, OversizedUploadedFile):
+            raise forms.ValidationError(
+                'Файл больше %(limit)s МБ.',
+                code='file_too_large',
+                params={'limit': MAX_UPLOAD_SIZE // (1024 * 1024)}
+            )
+        data.seek(0)
+        image = _open_image(data)
+        image_format = image.format
+        if image_format == 'GIF' and max(image.size) <= MAX_IMAGE_SIDE:
+            # GIF может быть анимированным, перекодировать его не нужно.
+            data.seek(0)
+            return data
+        content_type, extension = IMAGE_FORMATS[image_format]
+        name = os.path.splitext(os.path.basename(data.name))[0] + extension
+        return SimpleUploadedFile(name, _reencode(image), content_type)
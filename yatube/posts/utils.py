@@ -1,10 +1,150 @@
-from django.core.paginator import Paginator
+import base64
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 LATEST_POSTS_COUNT = 10
+CURSOR_SEPARATOR = '|'
+PAGE_LINKS_ON_EACH_SIDE = 2
+PAGE_LINKS_ON_ENDS = 1
+
+
+def encode_cursor(post):
+    """Кодирует ключ (pub_date, id) поста в токен для ссылки."""
+    raw = f'{post.pub_date.isoformat()}{CURSOR_SEPARATOR}{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(token):
+    """Возвращает пару (pub_date, id) или None для битого токена."""
+    try:
+        raw = base64.urlsafe_b64decode(token.encode()).decode()
+        pub_date, pk = raw.split(CURSOR_SEPARATOR)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, UnicodeError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPage(Page):
+    """Страница ленты, полученная по курсору, а не по номеру."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<CursorPage of %s posts>' % len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(self.object_list[-1])
 
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(self.object_list[0])
 
-def get_paginator(request, obj_list):
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id).
+
+    Не выполняет COUNT(*) и не использует OFFSET, поэтому любая страница
+    читается за одно обращение к индексу.
+    """
+
+    def get_cursor_page(self, after=None, before=None):
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        if before is not None:
+            return self._page_before(*before) or self._page_after()
+        if after is not None:
+            return self._page_after(*after)
+        return self._page_after()
+
+    def _page_after(self, pub_date=None, pk=None):
+        posts = self.object_list.order_by('-pub_date', '-pk')
+        if pub_date is not None:
+            posts = posts.filter(
+                Q(pub_date__lt=pub_date) | Q(pk__lt=pk),
+                pub_date__lte=pub_date
+            )
+        posts = list(posts[:self.per_page + 1])
+        has_next = len(posts) > self.per_page
+        return CursorPage(posts[:self.per_page], self,
+                          has_next=has_next,
+                          has_previous=pub_date is not None)
+
+    def _page_before(self, pub_date, pk):
+        posts = self.object_list.order_by('pub_date', 'pk').filter(
+            Q(pub_date__gt=pub_date) | Q(pk__gt=pk),
+            pub_date__gte=pub_date
+        )
+        posts = list(posts[:self.per_page + 1])
+        if not posts:
+            return None
+        has_previous = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        posts.reverse()
+        return CursorPage(posts, self,
+                          has_next=True,
+                          has_previous=has_previous)
+
+
+def get_page_links(page_obj, on_each_side=PAGE_LINKS_ON_EACH_SIDE,
+                   on_ends=PAGE_LINKS_ON_ENDS):
+    """Номера страниц для пагинатора: края и окно вокруг текущей.
+
+    Пропуски между ними обозначаются None, так что длина списка не зависит
+    от общего числа страниц.
+    """
+    number = page_obj.number
+    num_pages = page_obj.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    links = []
+    if number > on_each_side + on_ends + 1:
+        links.extend(range(1, on_ends + 1))
+        links.append(None)
+        links.extend(range(number - on_each_side, number + 1))
+    else:
+        links.extend(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends:
+        links.extend(range(number + 1, number + on_each_side + 1))
+        links.append(None)
+        links.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        links.extend(range(number + 1, num_pages + 1))
+    return links
+
+
+def get_numbered_page(request, obj_list, count=None):
     paginator = Paginator(obj_list, LATEST_POSTS_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if count is not None:
+        paginator.count = count
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.page_links = get_page_links(page_obj)
     return page_obj
+
+
+def get_paginator(request, obj_list, count=None):
+    if 'page' in request.GET:
+        return get_numbered_page(request, obj_list, count)
+    paginator = CursorPaginator(obj_list, LATEST_POSTS_COUNT)
+    return paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
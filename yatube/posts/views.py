@@ -1,26 +1,47 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 
+from core.replicas import read_from_replica
+
+from .cache import cache_anonymous_page
+from .conditional import (conditional_page, group_last_modified,
+                          index_last_modified, post_last_modified,
+                          profile_last_modified)
+from .counters import get_posts_count
+from .exporting import (CONTENT_TYPES, WRITERS, export_rows,
+                        get_export_filters)
 from .forms import PostForm
 from .models import Post, Group, User
-from .utils import get_paginator
+from .search import SearchResults
+from .thumbnails import prefetch_thumbnails
+from .utils import get_numbered_page, get_paginator
 
 
+@read_from_replica
+@conditional_page(index_last_modified, 'index')
+@cache_anonymous_page('index')
 def index(request):
     template = 'posts/index.html'
     posts = Post.objects.select_related('group', 'author')
     page_obj = get_paginator(request, posts)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+@read_from_replica
+@conditional_page(group_last_modified, 'group:{slug}')
+@cache_anonymous_page('group:{slug}')
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('group', 'author')
-    page_obj = get_paginator(request, posts)
+    page_obj = get_paginator(request, posts, group.posts_count)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
         'group': group,
@@ -28,23 +49,47 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@read_from_replica
+@conditional_page(profile_last_modified, 'profile:{username}')
+@cache_anonymous_page('profile:{username}')
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    posts_count = get_posts_count(author)
     posts = author.posts.select_related('group')
-    page_obj = get_paginator(request, posts)
+    page_obj = get_paginator(request, posts, posts_count)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
         'author': author,
+        'posts_count': posts_count,
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = get_numbered_page(request, SearchResults(query))
+    prefetch_thumbnails(page_obj)
+    context = {
+        'page_obj': page_obj,
+        'query': query,
     }
     return render(request, template, context)
 
 
+@read_from_replica
+@conditional_page(post_last_modified)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('group', 'author__stats'), pk=post_id
+    )
     context = {
         'post': post,
+        'posts_count': get_posts_count(post.author),
     }
     return render(request, template, context)
 
@@ -80,3 +125,22 @@ def post_edit(request, post_id):
         'post': post,
     }
     return render(request, template, context)
+
+
+@staff_member_required
+def export(request):
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in WRITERS:
+        return HttpResponseBadRequest('Формат выгрузки: jsonl или csv.')
+    try:
+        filters = get_export_filters(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest('Неверный формат даты.')
+    response = StreamingHttpResponse(
+        WRITERS[file_format](export_rows(**filters)),
+        content_type=CONTENT_TYPES[file_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{file_format}"'
+    )
+    return response
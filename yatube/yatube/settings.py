@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import hashlib
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -47,13 +48,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.replicas.StickyPrimaryMiddleware',
+    'core.middleware.ViewTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -75,6 +81,19 @@ TEMPLATES = [
         },
     },
 ]
+# Кэширующий загрузчик: каждый шаблон разбирается один раз на процесс,
+# а все шаблоны проекта — заранее, при старте (см. core/templates.py).
+TEMPLATES_PRECOMPILED = (
+    os.environ.get('YATUBE_TEMPLATES_PRECOMPILED', '') == '1'
+)
+if TEMPLATES_PRECOMPILED:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -85,8 +104,60 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переживает запрос и используется следующими.
+        'CONN_MAX_AGE': 60,
     }
 }
+# Реплики только для чтения: пути к копиям базы SQLite через запятую,
+# копии обновляет manage.py sync_replicas.
+REPLICA_PATHS = [path for path in
+                 os.environ.get('YATUBE_REPLICAS', '').split(',') if path]
+REPLICA_DATABASES = [f'replica_{number}'
+                     for number in range(1, len(REPLICA_PATHS) + 1)]
+DATABASES.update({
+    alias: {**DATABASES['default'], 'NAME': path,
+            'TEST': {'MIRROR': 'default'}}
+    for alias, path in zip(REPLICA_DATABASES, REPLICA_PATHS)
+})
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Сколько секунд после записи реплики считаются отстающими.
+REPLICA_LAG = 10
+# PRAGMA для каждого нового соединения с SQLite, см. core/signals.py.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+}
+# Кэш страниц и карточек. Без YATUBE_MEMCACHED — кэш в памяти процесса:
+# при нескольких воркерах сброс кэша и метка отставания реплик видны
+# только своему процессу, поэтому для них нужен memcached (адреса через
+# запятую). Префикс ключей зависит от базы, чтобы записи разных баз не
+# смешивались в одном кэше.
+MEMCACHED_LOCATIONS = [
+    location for location in
+    os.environ.get('YATUBE_MEMCACHED', '').split(',') if location
+]
+LOCAL_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if MEMCACHED_LOCATIONS:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': MEMCACHED_LOCATIONS,
+            'KEY_PREFIX': hashlib.md5(
+                DATABASES['default']['NAME'].encode()
+            ).hexdigest()[:8],
+        }
+    }
+else:
+    CACHES = LOCAL_CACHES
+# Тесты работают со своим кэшем в памяти, см. core/test_runner.py.
+TEST_RUNNER = 'core.test_runner.LocalCacheTestRunner'
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -124,6 +195,12 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# collectstatic добавляет хэш к именам и сжатые варианты .gz и .br
+# (br — если установлен brotli), см. core/staticfiles.py.
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+# Сколько секунд браузер кэширует статику без хэша в имени.
+STATIC_MAX_AGE = 60
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -132,3 +209,38 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Потоки для фонового создания миниатюр, 0 - создавать сразу.
+POST_THUMBNAIL_WORKERS = 2
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+# Доля запросов с замером Server-Timing, 0 отключает замеры.
+SERVER_TIMING_SAMPLE_RATE = 1.0
+# Приложения, для URL которых копятся гистограммы времени.
+SERVER_TIMING_NAMESPACES = ('posts', 'users', 'about')
+# Сжатие ответов, см. core/compression.py. br — если установлен brotli.
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BR_QUALITY = 5
+# Сколько байт потокового ответа копится перед сбросом сжатого буфера.
+COMPRESSION_STREAM_FLUSH_SIZE = 16 * 1024
+# Сколько хранятся сжатые байты страниц из кэша страниц.
+COMPRESSION_CACHE_TIMEOUT = 60 * 5
+# Прогрев воркера при загрузке yatube.wsgi, шаги — из core/warmup.py.
+# Уберите database, если приложение загружается до fork.
+WARMUP_ON_LOAD = os.environ.get('YATUBE_WARMUP', '1') == '1'
+WARMUP_STEPS = ('urls', 'translations', 'templates', 'thumbnails',
+                'database')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.warmup': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -20,8 +20,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from core.views import metrics
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('admin/metrics/', metrics, name='metrics'),
     path('admin/', admin.site.urls),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
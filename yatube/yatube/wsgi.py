@@ -7,10 +7,19 @@ For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Воркер начинает принимать запросы уже прогретым.
+if settings.WARMUP_ON_LOAD:
+    from core.warmup import format_timings, warm_up
+    logging.getLogger('core.warmup').info(
+        'Прогрев воркера %s: %s', os.getpid(), format_timings(warm_up())
+    )